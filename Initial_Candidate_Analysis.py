@@ -3,8 +3,13 @@ import requests
 import os
 from dotenv import load_dotenv
 import logging
-import PyPDF2
-import io
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from handoff import Handoff, post_handoff
+from blobs import blob_id
+from extraction import extract_document
+from bulk import API_TIMEOUT, EXPORT_FIELDS, BulkRun, extraction_pool, to_csv, to_parquet
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,187 +18,345 @@ if "success" not in st.session_state:
 # Load environment variables
 load_dotenv()
 
+API_URL = os.getenv("ANALYSIS_API_URL", "http://localhost:8000")
+# Seconds between progress polls while an analysis job runs
+POLL_INTERVAL = 1.0
+# Progress bar position and label for each stage reported by the API
+STAGES = {
+    "queued": (0.05, "Queued..."),
+    "running": (0.1, "Starting analysis..."),
+    "attached": (0.5, "Waiting for an identical analysis in progress..."),
+    "analyzing": (0.35, "Analyzing compatibility..."),
+    "generating_questions": (0.75, "Generating follow-up questions..."),
+    "done": (1.0, "Done"),
+    "failed": (1.0, "Failed")
+}
+
 def initialize_session_state():
-    if 'analysis_complete' not in st.session_state:
-        st.session_state.analysis_complete = False
-    if 'analysis_result' not in st.session_state:
-        st.session_state.analysis_result = None
-    if 'phone_number' not in st.session_state:
-        st.session_state.phone_number = ""
-
-def extract_text_from_pdf(pdf_file):
-    try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text.strip()
-    except Exception as e:
-        logger.error(f"Error extracting text from PDF: {str(e)}")
-        return None
+    if 'candidates' not in st.session_state:
+        st.session_state.candidates = []
+        st.session_state.next_candidate = 1
+        add_candidate()
+    if 'uploads' not in st.session_state:
+        st.session_state.uploads = {}
+    if 'stored_texts' not in st.session_state:
+        st.session_state.stored_texts = set()
+
+def add_candidate():
+    st.session_state.candidates.append({
+        "key": st.session_state.next_candidate,
+        "job_id": None,
+        "stage": None,
+        "result": None,
+        "error": None,
+        "handoff": None
+    })
+    st.session_state.next_candidate += 1
+
+@st.cache_resource
+def background_executor() -> ThreadPoolExecutor:
+    """Threads for blocking calls, shared across reruns and sessions"""
+    return ThreadPoolExecutor(max_workers=4)
+
+@st.cache_resource
+def bulk_extraction_pool():
+    """Worker processes for bulk CV extraction, shared across reruns and sessions"""
+    return extraction_pool()
+
+def load_upload(uploaded_file) -> dict:
+    """
+    Hash and extract an uploaded file, once per upload.
 
-def extract_text_from_file(uploaded_file):
+    Returns:
+        dict: {"name", "sha256", "text", "error"}
+    """
     if uploaded_file is None:
         return None
-    
+    upload = st.session_state.uploads.get(uploaded_file.file_id)
+    if upload is None:
+        upload = extract_document(uploaded_file.name, uploaded_file.getvalue())
+        if upload["error"]:
+            logger.error(f"Error processing file {uploaded_file.name}: {upload['error']}")
+        st.session_state.uploads[uploaded_file.file_id] = upload
+    return upload
+
+def preview_upload(label: str, upload: dict):
+    if upload["error"]:
+        st.error(f"Error processing file: {upload['error']}")
+        return
+    with st.expander(label):
+        text = upload["text"]
+        st.text(text[:500] + "..." if len(text) > 500 else text)
+
+def store_text(text: str) -> str:
+    """Store a text on the API once per session; requests then send its id instead"""
+    text_id = blob_id(text)
+    if text_id not in st.session_state.stored_texts:
+        response = requests.post(f"{API_URL}/blobs", json={"text": text}, timeout=30)
+        response.raise_for_status()
+        st.session_state.stored_texts.add(text_id)
+    return text_id
+
+def submit_analysis(candidate: dict, cv: str, jd: str):
+    """Start an analysis job on the API without waiting for it"""
     try:
-        # Get the file extension
-        file_extension = uploaded_file.name.split('.')[-1].lower()
-        
-        if file_extension == 'pdf':
-            return extract_text_from_pdf(uploaded_file)
-        elif file_extension == 'txt':
-            return str(uploaded_file.read().decode('utf-8'))
-        else:
-            st.error(f"Unsupported file format: {file_extension}")
-            return None
+        # The shared JD is uploaded once; the CV is stored by the API on first use
+        payload = {"cv": cv, "jd_id": store_text(jd)}
+        response = requests.post(f"{API_URL}/analysis-jobs", json=payload, timeout=10)
+        response.raise_for_status()
+        candidate.update(job_id=response.json()["job_id"], stage="queued", error=None)
     except Exception as e:
-        logger.error(f"Error processing file: {str(e)}")
-        st.error(f"Error processing file: {str(e)}")
-        return None
+        candidate["error"] = f"Error starting analysis: {str(e)}"
 
-def analyze_profile(cv, jd):
-    try:
-        response = requests.post(
-            "http://localhost:8000/analyze-profile",
-            json={"cv": cv, "jd": jd}
-        )
-        if response.status_code == 200:
-            st.session_state.analysis_result = response.json()
-            st.session_state.analysis_complete = True
-            return True
+def send_telegram_followup(phone_number: str, questions: dict, candidate_ref: str, jd_id: str, cv_id: str,
+                           role: str = None) -> dict:
+    """Hand the candidate to the running interview service; runs in a worker thread"""
+    questions_list = []
+    for category in questions.values():
+        questions_list.extend(category)
+
+    handoff = Handoff(
+        phone=phone_number,
+        questions=questions_list,
+        candidate_ref=candidate_ref,
+        jd_id=jd_id,
+        cv_id=cv_id,
+        role=role
+    )
+    result = post_handoff(handoff)
+    logger.info(f"Handoff queued with id {result['id']}")
+    return result
+
+@st.fragment(run_every=POLL_INTERVAL)
+def track_candidate(candidate: dict):
+    """Poll a candidate's running analysis or handoff without blocking the page"""
+    if candidate["job_id"] and candidate["result"] is None:
+        try:
+            response = requests.get(f"{API_URL}/analysis-jobs/{candidate['job_id']}", timeout=5)
+            response.raise_for_status()
+            job = response.json()
+        except Exception as e:
+            st.caption(f"Waiting for the analysis service: {str(e)}")
+            return
+        candidate["stage"] = job["stage"]
+        fraction, label = STAGES.get(job["stage"], (0.5, job["stage"]))
+        st.progress(fraction, text=label)
+        if job["status"] in ("done", "failed"):
+            candidate["result"] = job["result"]
+            candidate["error"] = job["error"] and f"Error in analysis: {job['error']}"
+            candidate["job_id"] = None
+            st.rerun(scope="app")
+
+    elif candidate["handoff"] is not None:
+        if not candidate["handoff"].done():
+            st.info("Sending follow-up questions...")
+            return
+        st.rerun(scope="app")
+
+def render_result(candidate: dict, phone_number: str, candidate_ref: str, jd_id: str, cv_id: str, role: str = None):
+    result = candidate["result"]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Compatibility Score", f"{result['compatibility_score']}%")
+
+    with col2:
+        if result['compatibility_score'] >= 70:
+            st.success("High Compatibility!")
+        elif result['compatibility_score'] >= 50:
+            st.warning("Moderate Compatibility")
         else:
-            st.error(f"Error in analysis: {response.text}")
-            return False
-    except Exception as e:
-        st.error(f"Error during analysis: {str(e)}")
-        return False
+            st.error("Low Compatibility")
 
-def send_telegram_followup():
-    try:
-        # Save questions to file
-        questions_list = []
-        for category in st.session_state.analysis_result['questions'].values():
-            questions_list.extend(category)
-        
-        with open("followup_questions.txt", "w") as f:
-            for question in questions_list:
-                f.write(f"{question}\n")
-        
-        # Run Telegram script
-        logger.info("Starting Telegram script")
-        os.system('python telegram.py')
-        st.session_state.success = True
-        st.switch_page("pages/Response_Analysis.py")
-        return True
-    except Exception as e:
-        logger.error(f"Error sending follow-up: {str(e)}")
-        return False
+    # Display detailed analysis sections
+    with st.expander("💪 Strengths", expanded=True):
+        for strength in result['strengths']:
+            st.write(f"• {strength}")
+
+    with st.expander("🔍 Areas to Explore"):
+        for concern in result['potential_concerns']:
+            st.write(f"• {concern}")
+
+    with st.expander("👥 Work Style Indicators"):
+        for indicator in result['work_style_indicators']:
+            st.write(f"• {indicator}")
+
+    handoff = candidate["handoff"]
+    if handoff is not None and handoff.done():
+        if handoff.exception() is None:
+            st.success("Follow-up questions sent successfully!")
+            st.session_state.success = True
+            st.page_link("pages/Response_Analysis.py", label="Go to Response Analysis", icon="📊")
+        else:
+            logger.error(f"Error sending follow-up: {str(handoff.exception())}")
+            st.error("Failed to send follow-up questions.")
+
+    # Action buttons
+    col1, col2 = st.columns(2)
+    with col1:
+        sending = handoff is not None and not handoff.done()
+        if st.button("📧 Send Follow-up", key=f"send_followup_{candidate['key']}", disabled=sending):
+            if not phone_number:
+                st.error("Please enter candidate's phone number!")
+            else:
+                candidate["handoff"] = background_executor().submit(
+                    send_telegram_followup, phone_number, result['questions'], candidate_ref, jd_id, cv_id, role
+                )
+                st.rerun()
+
+    with col2:
+        st.button(
+            "📅 Schedule Call",
+            key=f"schedule_{candidate['key']}",
+            disabled=True,
+            help="Call scheduling is not available yet"
+        )
+
+    # Reset button
+    if st.button("Start New Analysis", key=f"reset_{candidate['key']}"):
+        candidate.update(job_id=None, stage=None, result=None, error=None, handoff=None)
+        st.rerun()
+
+def candidate_tab(candidate: dict, jd_upload: dict, role: str = None):
+    key = candidate["key"]
+    phone_number = st.text_input(
+        "Candidate Phone Number (with country code)",
+        key=f"phone_{key}",
+        placeholder="+1234567890"
+    )
+    cv_upload = load_upload(st.file_uploader("Upload CV (PDF or TXT)", type=['pdf', 'txt'], key=f"cv_{key}"))
+    if cv_upload:
+        preview_upload("Preview CV Text", cv_upload)
+
+    cv = cv_upload and cv_upload["text"]
+    jd = jd_upload and jd_upload["text"]
+    # Blob ids of the texts
+    jd_id = blob_id(jd) if jd else None
+    cv_id = blob_id(cv) if cv else None
+
+    if candidate["error"]:
+        st.error(candidate["error"])
+
+    if candidate["result"] is None and candidate["job_id"] is None:
+        if st.button("Analyze Compatibility", key=f"analyze_{key}", disabled=not (cv and jd)):
+            submit_analysis(candidate, cv, jd)
+            st.rerun()
+
+    if candidate["job_id"] or (candidate["handoff"] is not None and not candidate["handoff"].done()):
+        track_candidate(candidate)
+
+    if candidate["result"]:
+        render_result(candidate, phone_number, cv_upload and cv_upload["name"], jd_id, cv_id, role)
 
 def job_followup_interface():
     st.header("Job Application Follow-up")
-    
+
     # Initialize session state
     initialize_session_state()
-    
-    # Input fields
-    # st.session_state.phone_number = st.text_input(
-    #     "Candidate Phone Number (with country code)", 
-    #     value=st.session_state.phone_number,
-    #     placeholder="+1234567890"
-    # )
-    
-    # cv = st.text_area("Paste CV", height=200)
-    # jd = st.text_area("Paste Job Description", height=200)
-    # File upload fields
-    cv_file = st.file_uploader("Upload CV (PDF or TXT)", type=['pdf', 'txt'])
-    jd_file = st.file_uploader("Upload Job Description (PDF or TXT)", type=['pdf', 'txt'])
-    
-    # Preview extracted text
-    cv = None
-    jd = None
-    
-    if cv_file:
-        cv = extract_text_from_file(cv_file)
-        with st.expander("Preview CV Text"):
-            st.text(cv[:500] + "..." if cv and len(cv) > 500 else cv)
-    
-    if jd_file:
-        jd = extract_text_from_file(jd_file)
-        with st.expander("Preview Job Description Text"):
-            st.text(jd[:500] + "..." if jd and len(jd) > 500 else jd)
-    
-    # Analysis button
-    if not st.session_state.analysis_complete:
-        if st.button("Analyze Compatibility") and cv and jd:
-            with st.spinner("Analyzing compatibility..."):
-                if analyze_profile(cv, jd):
-                    st.rerun()
-    
-    # Display results if analysis is complete
-    if st.session_state.analysis_complete and st.session_state.analysis_result:
-        result = st.session_state.analysis_result
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("Compatibility Score", f"{result['compatibility_score']}%")
-        
-        with col2:
-            if result['compatibility_score'] >= 70:
-                st.success("High Compatibility!")
-            elif result['compatibility_score'] >= 50:
-                st.warning("Moderate Compatibility")
-            else:
-                st.error("Low Compatibility")
-        
-        # Display detailed analysis sections
-        with st.expander("💪 Strengths", expanded=True):
-            for strength in result['strengths']:
-                st.write(f"• {strength}")
-        
-        with st.expander("🔍 Areas to Explore"):
-            for concern in result['potential_concerns']:
-                st.write(f"• {concern}")
-        
-        with st.expander("👥 Work Style Indicators"):
-            for indicator in result['work_style_indicators']:
-                st.write(f"• {indicator}")
-        
-        # Action buttons
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("📧 Send Follow-up", key="send_followup"):
-                # if not st.session_state.phone_number:
-                #     st.error("Please enter candidate's phone number!")
-                # else:
-                    with st.spinner("Sending follow-up questions..."):
-                        if send_telegram_followup():
-                            st.success("Follow-up questions sent successfully!")
-                        else:
-                            st.error("Failed to send follow-up questions.")
-        
-        with col2:
-            if st.button("📅 Schedule Call"):
-                st.success("Interview scheduling email sent!")
-        
-        # Reset button
-        if st.button("Start New Analysis"):
-            st.session_state.analysis_complete = False
-            st.session_state.analysis_result = None
-            st.rerun()
+
+    # One job description, shared by every candidate tab
+    jd_upload = load_upload(st.file_uploader("Upload Job Description (PDF or TXT)", type=['pdf', 'txt']))
+    if jd_upload:
+        preview_upload("Preview Job Description Text", jd_upload)
+    # Stays the same when the JD text is edited; selects per-role assets in the interview service
+    role = st.text_input(
+        "Role (optional)",
+        placeholder="backend-engineer",
+        help="Letters, digits, '-', '_' or '.'; per-role starters live in roles/<role>/"
+    ).strip() or None
+
+    if st.button("➕ Add Candidate"):
+        add_candidate()
+
+    # Candidates are analyzed in parallel, each in its own tab
+    candidates = st.session_state.candidates
+    tabs = st.tabs([f"Candidate {candidate['key']}" for candidate in candidates])
+    for tab, candidate in zip(tabs, candidates):
+        with tab:
+            candidate_tab(candidate, jd_upload, role)
+
+def analyze_cv(cv: str, jd_id: str) -> dict:
+    """Analyze one CV against a stored JD; bulk runs call this from worker threads"""
+    response = requests.post(f"{API_URL}/analyze-profile", json={"cv": cv, "jd_id": jd_id}, timeout=API_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def render_bulk_table(run: BulkRun):
+    rows = run.snapshot()
+    counts = run.counts()
+    finished = sum(counts.get(status, 0) for status in ("done", "failed", "cancelled"))
+    if rows:
+        st.progress(finished / len(rows), text=f"{finished} of {len(rows)} CVs processed")
+    st.caption(" · ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+    # Column headers sort the table
+    st.dataframe(rows, column_order=EXPORT_FIELDS, hide_index=True, use_container_width=True)
+    return rows
+
+@st.fragment(run_every=POLL_INTERVAL)
+def track_bulk_run(run: BulkRun):
+    """Refresh the results table while a bulk run is in progress"""
+    if run.finished.is_set():
+        st.rerun(scope="app")
+    render_bulk_table(run)
+    if st.button("Cancel", key="bulk_cancel"):
+        run.cancel()
+
+def bulk_interface():
+    st.header("Bulk CV Screening")
+    initialize_session_state()
+
+    jd_upload = load_upload(st.file_uploader("Upload Job Description (PDF or TXT)", type=['pdf', 'txt'], key="bulk_jd"))
+    if jd_upload:
+        preview_upload("Preview Job Description Text", jd_upload)
+    cv_files = st.file_uploader(
+        "Upload CVs (PDF, TXT or ZIP)",
+        type=['pdf', 'txt', 'zip'],
+        accept_multiple_files=True,
+        key="bulk_cvs"
+    )
+
+    run = st.session_state.get('bulk_run')
+    running = run is not None and not run.finished.is_set()
+    jd = jd_upload and jd_upload["text"]
+    if st.button("Screen CVs", disabled=running or not (cv_files and jd)):
+        try:
+            jd_id = store_text(jd)
+        except Exception as e:
+            st.error(f"Error uploading the job description: {str(e)}")
+            return
+        run = BulkRun(list(cv_files), partial(analyze_cv, jd_id=jd_id), bulk_extraction_pool())
+        threading.Thread(target=run.run, name="bulk-run", daemon=True).start()
+        st.session_state.bulk_run = run
+        running = True
+
+    if run is None:
+        return
+    if running:
+        track_bulk_run(run)
+        return
+
+    rows = render_bulk_table(run)
+    st.caption(f"Finished in {run.elapsed:.0f}s")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Download CSV", to_csv(rows), "cv_screening.csv", "text/csv")
+    with col2:
+        st.download_button("Download Parquet", to_parquet(rows), "cv_screening.parquet", "application/octet-stream")
 
 def main():
     st.title("AI Recruitment Assistant")
-    
+
     mode = st.sidebar.selectbox(
         "Select Mode",
-        ["Job Application Follow-up", "Interview Preparation"]
+        ["Job Application Follow-up", "Bulk CV Screening", "Interview Preparation"]
     )
-    
+
     if mode == "Job Application Follow-up":
         job_followup_interface()
+    elif mode == "Bulk CV Screening":
+        bulk_interface()
     else:
         st.info("Interview Preparation feature coming soon!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
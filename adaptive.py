@@ -0,0 +1,56 @@
+# adaptive.py
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+ADAPTIVE_FOLLOWUPS = os.getenv('ADAPTIVE_FOLLOWUPS', 'false').lower() == 'true'
+# Answers shorter than this many words get a follow-up question
+THIN_ANSWER_WORDS = int(os.getenv('THIN_ANSWER_WORDS', '15'))
+
+def is_thin_answer(answer: str) -> bool:
+    """Whether an answer is too short to assess on its own."""
+    return len(answer.split()) < THIN_ANSWER_WORDS
+
+def extract_question(text: str):
+    """First question sentence in agent output, without list markers or labels."""
+    for line in text.splitlines():
+        line = re.sub(r'^\s*(?:[-*•]|\d+[.)])?\s*(?:\*\*)?(?:Next question|Follow-up question)?:?(?:\*\*)?\s*', '', line, flags=re.I)
+        line = line.strip().strip('"')
+        if line.endswith('?'):
+            return line
+    return None
+
+def generate_followup(question: str):
+    """
+    Generate a probing follow-up for a question, assuming a brief answer.
+
+    Runs the interview crew synchronously; call it from a worker thread.
+
+    Returns:
+        str: The follow-up question, or None if none could be extracted
+    """
+    # crewai is only needed when adaptive mode is on
+    from crewai import Crew, Process
+    from agents import InterviewAgents
+    from tasks import InterviewTasks
+
+    agent = InterviewAgents().qa_agent
+    crew = Crew(
+        agents=[agent],
+        tasks=[InterviewTasks.conduct_interview(
+            agent,
+            f"A brief answer with few specifics to the question: {question}",
+            "Behavioral job follow-up. When an answer is thin, ask exactly one short, "
+            "friendly follow-up question that asks for a concrete example, the candidate's "
+            "own role and the outcome."
+        )],
+        process=Process.sequential,
+        verbose=False
+    )
+    result = str(crew.kickoff())
+    followup = extract_question(result)
+    if followup is None:
+        logger.warning(f"No follow-up question found in: {result}")
+    return followup
@@ -1,9 +1,19 @@
 # agents.py
 from crewai import Agent, Task, Crew, Process
 from typing import List, Dict, Optional
+from routing import build_llm, escalate, route
 
 class JobAgents:
-    def __init__(self):
+    def __init__(self, stream: bool = False, escalated: bool = False):
+        # Model tier per agent; escalated moves each agent one tier up
+        self.tiers = {}
+        for name in ("profile_analyzer", "question_generator", "communication_agent"):
+            tier = route(name)
+            self.tiers[name] = (escalate(tier) or tier) if escalated else tier
+
+        # Streaming LLM for the analyzer so partial output can be consumed early
+        analyzer_llm = build_llm(self.tiers["profile_analyzer"], stream=stream)
+
         # Profile Analyzer Agent
         self.profile_analyzer = Agent(
             role="Cultural Fit Analyzer",
@@ -13,6 +23,7 @@ class JobAgents:
             of how well someone might adapt to different work environments, team dynamics, 
             and organizational cultures. You look beyond technical skills to understand 
             the whole person.""",
+            llm=analyzer_llm,
             verbose=True
         )
 
@@ -25,6 +36,7 @@ class JobAgents:
             that reveal working style, collaboration preferences, problem-solving approaches, 
             and adaptation to change. You focus on understanding the person behind the 
             resume.""",
+            llm=build_llm(self.tiers["question_generator"]),
             verbose=True
         )
 
@@ -36,6 +48,7 @@ class JobAgents:
             encourage open dialogue. You know how to make candidates feel comfortable 
             while maintaining professionalism. You're skilled at crafting messages 
             that elicit honest and meaningful responses.""",
+            llm=build_llm(self.tiers["communication_agent"]),
             verbose=True
         )
         
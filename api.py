@@ -1,135 +1,492 @@
 # api.py
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from pydantic import BaseModel, model_validator
+from typing import Callable, List, Dict, Optional, TYPE_CHECKING
 import logging
 import json
+import os
 import re
-from crewai import Crew, Process
-from agents import JobAgents
-from tasks import JobTasks
+import time
+import uuid
+import asyncio
+from datetime import datetime
+from functools import lru_cache, partial
+from lazy import crewai, crewai_events, job_crew
+from db import connect, DB_PATH
+from blobs import BlobStore
+from handoff import Handoff, post_handoff
+from question_bank import QuestionBank, analysis_tags, merge_questions, timed
+from call_policy import CallPolicy, DeadlineExceeded, InvalidOutput
+from routing import escalate
+from singleflight import SingleFlight, content_key
+from schemas import CompatibilityResponse, GeneratedQuestions, ProfileAnalysis, parse_output
+
+if TYPE_CHECKING:
+    from agents import JobAgents
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# Stream the analysis and overlap question generation with it
+ANALYSIS_STREAMING = os.getenv("ANALYSIS_STREAMING", "false").lower() == "true"
+# Analysis fields the question prompt can start from
+SPECULATIVE_FIELDS = ("strengths", "potential_concerns")
+
+# Finished analysis jobs kept for polling; the oldest are dropped first
+MAX_FINISHED_JOBS = 200
+
+@lru_cache(maxsize=None)
+def question_bank() -> QuestionBank:
+    """The question bank, opened on first use so importing the API creates no database."""
+    return QuestionBank()
+
+# CV and JD texts, stored once and referenced by id
+blob_store = BlobStore()
+# Identical concurrent analyses, in this worker or others, run once
+single_flight = SingleFlight(shared_errors=(DeadlineExceeded, InvalidOutput))
+# Deadline, retries, re-prompts and hedging per crew stage
+POLICIES = {
+    "analysis": CallPolicy("analysis", deadline=float(os.getenv("ANALYSIS_DEADLINE_SECONDS", "120"))),
+    "questions": CallPolicy("questions", deadline=float(os.getenv("QUESTIONS_DEADLINE_SECONDS", "90")))
+}
+analysis_jobs: Dict[str, dict] = {}
+# Running job tasks, referenced so they are not garbage collected
+analysis_tasks = set()
+
 class CVAnalysisRequest(BaseModel):
-    cv: str
-    jd: str
-
-class CompatibilityResponse(BaseModel):
-    compatibility_score: int
-    strengths: List[str]
-    potential_concerns: List[str]
-    work_style_indicators: List[str]
-    culture_fit_aspects: List[str]
-    adaptability_signals: List[str]
-    questions: Dict[str, List[str]]
-    next_steps: str  # Added this required field
-
-def extract_json_from_text(text: str) -> dict:
-    """Extract JSON from text, handling various formats."""
-    try:
-        # Try to find JSON pattern in the text
-        json_pattern = r'\{[\s\S]*\}'
-        json_match = re.search(json_pattern, text)
-        
-        if json_match:
-            # Clean up the extracted JSON string
-            json_str = json_match.group()
-            # Remove markdown code blocks if present
-            json_str = json_str.replace('```json', '').replace('```', '')
-            return json.loads(json_str)
-    except Exception as e:
-        logger.warning(f"Failed to parse JSON: {str(e)}")
-    
-    # Return default structure if parsing fails
-    return {
-        "compatibility_score": 50,
-        "strengths": ["Candidate shows potential", "Review needed for specific details"],
-        "potential_concerns": ["Further assessment recommended"],
-        "work_style_indicators": ["Need more information"],
-        "culture_fit_aspects": ["To be determined"],
-        "adaptability_signals": ["Requires further evaluation"],
-        "questions": {
-            "situational": ["Could you describe a challenging work situation and how you handled it?"],
-            "cultural_fit": ["What type of work environment helps you perform your best?"],
-            "adaptability": ["How do you handle unexpected changes in priorities?"],
-            "collaboration": ["How do you prefer to work within a team?"],
-            "growth": ["What are your learning goals for the next year?"]
-        }
-    }
+    """A CV and a JD, each as text or as the id of a text stored with POST /blobs"""
+    cv: Optional[str] = None
+    jd: Optional[str] = None
+    cv_id: Optional[str] = None
+    jd_id: Optional[str] = None
 
-@app.post("/analyze-profile", response_model=CompatibilityResponse)
-async def analyze_profile(request: CVAnalysisRequest):
-    try:
-        logger.info("Starting compatibility analysis")
-        job_agents = JobAgents()
-        
-        # Run analysis
-        analysis_crew = Crew(
-            agents=[job_agents.profile_analyzer],
-            tasks=[JobTasks.analyze_profile(job_agents.profile_analyzer, request.cv, request.jd)],
-            process=Process.sequential,
+    @model_validator(mode="after")
+    def one_of_text_or_id(self):
+        for field in ("cv", "jd"):
+            if (getattr(self, field) is None) == (getattr(self, f"{field}_id") is None):
+                raise ValueError(f"Provide exactly one of {field} and {field}_id")
+        return self
+
+class BlobRequest(BaseModel):
+    text: str
+
+class HandoffRequest(BaseModel):
+    phone: str
+    questions: List[str]
+    candidate_ref: Optional[str] = None
+    jd_id: Optional[str] = None
+    cv_id: Optional[str] = None
+    role: Optional[str] = None
+
+class AnalysisJobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, done or failed
+    stage: str
+    events: List[Dict]
+    result: Optional[CompatibilityResponse] = None
+    error: Optional[str] = None
+
+REPROMPT = (
+    "\n\nYour previous answer did not match the required schema: {error}. "
+    "Reply with only the JSON object described above, with no other text."
+)
+
+def crew_output(output) -> str:
+    """The validated structured output of a crew run as JSON, else its raw text."""
+    if output.pydantic is not None:
+        return output.pydantic.model_dump_json()
+    return output.raw
+
+def extract_partial_fields(text: str, fields: tuple) -> dict:
+    """Extract fields whose JSON value is already complete in partial text."""
+    decoder = json.JSONDecoder()
+    found = {}
+    for field in fields:
+        match = re.search(r'"%s"\s*:\s*' % re.escape(field), text)
+        if not match:
+            continue
+        try:
+            value, _ = decoder.raw_decode(text, match.end())
+        except ValueError:
+            # Value is still being streamed
+            continue
+        found[field] = value
+    return found
+
+def agents_for(job_agents: "JobAgents", policy: CallPolicy, agent: str, feedback: Optional[str], hedged: bool) -> "JobAgents":
+    """Agents for one call attempt under a policy; agent is the one the stage runs."""
+    JobAgents, _ = job_crew()
+    if feedback and escalate(job_agents.tiers[agent]):
+        # Output failed validation: retry one model tier up
+        policy.count("escalations")
+        return JobAgents(escalated=True)
+    # A hedged request runs alongside the first, so it gets its own agents
+    return JobAgents() if hedged else job_agents
+
+def run_analysis(job_agents: "JobAgents", cv: str, jd: str) -> dict:
+    """Run the analysis crew and parse its output."""
+    _, JobTasks = job_crew()
+
+    def call(feedback: Optional[str], hedged: bool) -> str:
+        analyzer = agents_for(job_agents, POLICIES["analysis"], "profile_analyzer", feedback, hedged).profile_analyzer
+        task = JobTasks.analyze_profile(analyzer, cv, jd)
+        if feedback:
+            task.description += REPROMPT.format(error=feedback)
+        analysis_crew = crewai().Crew(
+            agents=[analyzer],
+            tasks=[task],
+            process=crewai().Process.sequential,
             verbose=True
         )
-        
-        analysis_result = analysis_crew.kickoff()
+        analysis_result = crew_output(analysis_crew.kickoff())
         logger.info(f"Raw analysis result: {analysis_result}")
-        
-        # Parse analysis result
-        parsed_analysis = extract_json_from_text(str(analysis_result))
-        logger.info(f"Parsed analysis: {parsed_analysis}")
-        
-        # Generate questions
-        questions_crew = Crew(
-            agents=[job_agents.question_generator],
-            tasks=[JobTasks.generate_questions(
-                job_agents.question_generator,
-                json.dumps(parsed_analysis)
-            )],
-            process=Process.sequential,
+        return analysis_result
+
+    parsed_analysis = POLICIES["analysis"].run(call, partial(parse_output, ProfileAnalysis))
+    logger.info(f"Parsed analysis: {parsed_analysis}")
+    return parsed_analysis
+
+def generate_questions(job_agents: "JobAgents", analysis: dict) -> dict:
+    """Run the question crew for an (optionally partial) analysis."""
+    _, JobTasks = job_crew()
+
+    def call(feedback: Optional[str], hedged: bool) -> str:
+        generator = agents_for(job_agents, POLICIES["questions"], "question_generator", feedback, hedged).question_generator
+        task = JobTasks.generate_questions(generator, json.dumps(analysis))
+        if feedback:
+            task.description += REPROMPT.format(error=feedback)
+        questions_crew = crewai().Crew(
+            agents=[generator],
+            tasks=[task],
+            process=crewai().Process.sequential,
             verbose=True
         )
-        
-        questions_result = questions_crew.kickoff()
+        questions_result = crew_output(questions_crew.kickoff())
         logger.info(f"Raw questions result: {questions_result}")
-        
-        # Parse questions result
-        parsed_questions = extract_json_from_text(str(questions_result))
-        logger.info(f"Parsed questions: {parsed_questions}")
-        
-        # Determine next steps based on compatibility score
-        compatibility_score = parsed_analysis.get('compatibility_score', 50)
-        if compatibility_score >= 80:
-            next_steps = "Schedule immediate follow-up interview"
-        elif compatibility_score >= 60:
-            next_steps = "Schedule initial screening call"
-        else:
-            next_steps = "Review additional candidates before proceeding"
-        
-        # Combine results
-        return CompatibilityResponse(
-            compatibility_score=compatibility_score,
-            strengths=parsed_analysis.get('strengths', []),
-            potential_concerns=parsed_analysis.get('potential_concerns', []),
-            work_style_indicators=parsed_analysis.get('work_style_indicators', []),
-            culture_fit_aspects=parsed_analysis.get('culture_fit_aspects', []),
-            adaptability_signals=parsed_analysis.get('adaptability_signals', []),
-            questions=parsed_questions.get('questions', {
-                'situational': [],
-                'cultural_fit': [],
-                'adaptability': [],
-                'collaboration': [],
-                'growth': []
-            }),
-            next_steps=next_steps  # Added this field to the response
+        return questions_result
+
+    parsed_questions = POLICIES["questions"].run(call, partial(parse_output, GeneratedQuestions))
+    logger.info(f"Parsed questions: {parsed_questions}")
+    return parsed_questions
+
+def draft_questions(job_agents: "JobAgents", analysis: dict, jd: str) -> tuple:
+    """
+    Serve questions from the question bank where the analysis tags match,
+    and generate only the gaps.
+
+    Nothing is written to the bank here: generate_questions only returns
+    output that passed GeneratedQuestions validation, and the caller banks
+    it with bank_update() once it knows the questions will be used, so a
+    discarded speculative run neither stores questions nor counts a lookup.
+
+    Returns:
+        tuple: (parsed_questions, bank_update)
+    """
+    bank = question_bank()
+    tags = analysis_tags(analysis)
+    banked, missing = bank.lookup(jd, tags)
+    generated = {}
+    generation_seconds = 0.0
+
+    if missing or not tags:
+        # Restrict the prompt to the tags the bank could not cover
+        gap_analysis = dict(analysis)
+        gap_analysis['strengths'] = [text for kind, text in missing if kind == 'strength']
+        gap_analysis['potential_concerns'] = [text for kind, text in missing if kind == 'concern']
+        parsed_questions, generation_seconds = timed(generate_questions, job_agents, gap_analysis)
+        generated = parsed_questions['questions']
+
+    def bank_update():
+        if generated:
+            bank.add(jd, missing, generated)
+        bank.record(jd, len(tags), len(tags) - len(missing), generation_seconds)
+        logger.info(f"Question bank served {len(tags) - len(missing)} of {len(tags)} tags")
+
+    return {"questions": merge_questions(banked, generated)}, bank_update
+
+def run_questions(job_agents: "JobAgents", analysis: dict, jd: str) -> dict:
+    """Questions for an analysis, banking the newly generated ones."""
+    parsed_questions, bank_update = draft_questions(job_agents, analysis, jd)
+    bank_update()
+    return parsed_questions
+
+async def run_streaming_pipeline(cv: str, jd: str, on_stage: Callable[[str], None]) -> tuple:
+    """
+    Run analysis with a streaming LLM and start question generation as soon
+    as the speculative fields are complete in the partial output.
+
+    The speculative questions are kept only if the final analysis agrees on
+    those fields; otherwise they are discarded and generated again.
+    on_stage is called with "analyzing" and "generating_questions".
+
+    Returns:
+        tuple: (parsed_analysis, parsed_questions)
+    """
+    JobAgents, _ = job_crew()
+    events = crewai_events()
+    job_agents = JobAgents(stream=True)
+    analyzer_llm = job_agents.profile_analyzer.llm
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+
+    def on_chunk(source, event):
+        if source is analyzer_llm:
+            loop.call_soon_threadsafe(chunks.put_nowait, event.chunk)
+
+    events.crewai_event_bus.on(events.LLMStreamChunkEvent)(on_chunk)
+    on_stage("analyzing")
+    try:
+        analysis_future = asyncio.ensure_future(
+            asyncio.to_thread(run_analysis, job_agents, cv, jd)
         )
-        
+        speculative_fields = None
+        speculative_task = None
+        buffer = ""
+
+        # Watch the stream until the fields are available or analysis ends
+        while not analysis_future.done():
+            get_chunk = asyncio.ensure_future(chunks.get())
+            await asyncio.wait(
+                {get_chunk, analysis_future},
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not get_chunk.done():
+                get_chunk.cancel()
+                break
+            buffer += get_chunk.result()
+            partial = extract_partial_fields(buffer, SPECULATIVE_FIELDS)
+            if len(partial) == len(SPECULATIVE_FIELDS):
+                speculative_fields = partial
+                logger.info("Starting speculative question generation")
+                on_stage("generating_questions")
+                speculative_task = asyncio.ensure_future(
+                    asyncio.to_thread(draft_questions, job_agents, partial, jd)
+                )
+                break
+
+        parsed_analysis = await analysis_future
+    finally:
+        events.crewai_event_bus.off(events.LLMStreamChunkEvent, on_chunk)
+
+    if speculative_task is not None:
+        final_fields = {
+            field: parsed_analysis.get(field) for field in SPECULATIVE_FIELDS
+        }
+        if final_fields == speculative_fields:
+            logger.info("Speculative questions accepted")
+            parsed_questions, bank_update = await speculative_task
+            await asyncio.to_thread(bank_update)
+            return parsed_analysis, parsed_questions
+        # The worker thread may still finish; its questions are never banked
+        logger.info("Final analysis contradicts speculation, regenerating questions")
+        speculative_task.cancel()
+    else:
+        on_stage("generating_questions")
+
+    parsed_questions = await asyncio.to_thread(run_questions, job_agents, parsed_analysis, jd)
+    return parsed_analysis, parsed_questions
+
+def build_response(parsed_analysis: dict, parsed_questions: dict) -> CompatibilityResponse:
+    """Combine validated analysis and questions into the API response."""
+    # Determine next steps based on compatibility score
+    compatibility_score = parsed_analysis['compatibility_score']
+    if compatibility_score >= 80:
+        next_steps = "Schedule immediate follow-up interview"
+    elif compatibility_score >= 60:
+        next_steps = "Schedule initial screening call"
+    else:
+        next_steps = "Review additional candidates before proceeding"
+
+    return CompatibilityResponse(
+        **parsed_analysis,
+        questions=parsed_questions['questions'],
+        next_steps=next_steps  # Added this field to the response
+    )
+
+async def run_pipeline(cv: str, jd: str, on_stage: Callable[[str], None] = None) -> CompatibilityResponse:
+    """
+    Analyze a CV against a JD and generate follow-up questions.
+
+    Crews run in worker threads, so the event loop keeps serving other
+    requests. on_stage is called as the pipeline moves through its stages.
+    """
+    on_stage = on_stage or (lambda stage: None)
+    if ANALYSIS_STREAMING:
+        parsed_analysis, parsed_questions = await run_streaming_pipeline(cv, jd, on_stage)
+    else:
+        JobAgents, _ = job_crew()
+        job_agents = JobAgents()
+        on_stage("analyzing")
+        parsed_analysis = await asyncio.to_thread(run_analysis, job_agents, cv, jd)
+        on_stage("generating_questions")
+        parsed_questions = await asyncio.to_thread(run_questions, job_agents, parsed_analysis, jd)
+    return build_response(parsed_analysis, parsed_questions)
+
+def record_result(request_key: str, cv_id: str, jd_id: str, response: CompatibilityResponse):
+    """Append a computed analysis to analysis_results for reporting."""
+    conn = connect(DB_PATH)
+    conn.execute('''
+    INSERT INTO analysis_results
+        (request_key, jd_id, cv_id, compatibility_score, next_steps, result, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        request_key,
+        jd_id,
+        cv_id,
+        response.compatibility_score,
+        response.next_steps,
+        response.model_dump_json(),
+        datetime.utcnow().isoformat()
+    ))
+    conn.commit()
+    conn.close()
+
+def store_request_texts(request: CVAnalysisRequest) -> tuple:
+    """
+    Store a request's texts and return their (cv_id, jd_id).
+
+    Raises:
+        KeyError: If a referenced id has no stored text
+    """
+    ids = []
+    for field in ("cv", "jd"):
+        text = getattr(request, field)
+        if text is not None:
+            ids.append(blob_store.put(text))
+            continue
+        text_id = getattr(request, f"{field}_id")
+        if blob_store.missing([text_id]):
+            raise KeyError(f"No stored text for {field}_id {text_id}")
+        ids.append(text_id)
+    return tuple(ids)
+
+async def request_text_ids(request: CVAnalysisRequest) -> tuple:
+    try:
+        return await asyncio.to_thread(store_request_texts, request)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+async def analyze(cv_id: str, jd_id: str, on_stage: Callable[[str], None] = None) -> CompatibilityResponse:
+    """run_pipeline for stored texts, computed once for concurrent identical requests."""
+    on_stage = on_stage or (lambda stage: None)
+
+    # Ids are content hashes, so they key identical requests
+    key = content_key("analyze-profile", cv_id=cv_id, jd_id=jd_id)
+
+    async def compute() -> str:
+        # Only the computing caller loads the texts
+        cv, jd = await asyncio.to_thread(lambda: (blob_store.get(cv_id), blob_store.get(jd_id)))
+        response = await run_pipeline(cv, jd, on_stage)
+        record_result(key, cv_id, jd_id, response)
+        return response.model_dump_json()
+
+    result = await single_flight.run(
+        key,
+        compute,
+        on_attach=lambda: on_stage("attached")
+    )
+    return CompatibilityResponse.model_validate_json(result)
+
+@app.post("/analyze-profile", response_model=CompatibilityResponse)
+async def analyze_profile(request: CVAnalysisRequest):
+    cv_id, jd_id = await request_text_ids(request)
+    try:
+        logger.info("Starting compatibility analysis")
+        return await analyze(cv_id, jd_id)
+    except DeadlineExceeded as e:
+        logger.error(f"Deadline exceeded in analyze_profile: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except InvalidOutput as e:
+        logger.error(f"Invalid model output in analyze_profile: {str(e)}")
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         logger.error(f"Error in analyze_profile: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error analyzing profile: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+async def run_analysis_job(job: dict, cv_id: str, jd_id: str):
+    def on_stage(stage: str):
+        job["stage"] = stage
+        job["events"].append({"stage": stage, "at": time.time()})
+
+    job["status"] = "running"
+    try:
+        job["result"] = await analyze(cv_id, jd_id, on_stage)
+        job["status"] = "done"
+    except Exception as e:
+        logger.error(f"Error in analysis job {job['job_id']}: {str(e)}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    on_stage(job["status"])
+
+    finished = [job_id for job_id, other in analysis_jobs.items() if other["status"] in ("done", "failed")]
+    for job_id in finished[:-MAX_FINISHED_JOBS]:
+        del analysis_jobs[job_id]
+
+@app.post("/analysis-jobs", status_code=202)
+async def create_analysis_job(request: CVAnalysisRequest):
+    """Start an analysis in the background; poll GET /analysis-jobs/{job_id} for progress"""
+    cv_id, jd_id = await request_text_ids(request)
+    job_id = uuid.uuid4().hex
+    job = analysis_jobs[job_id] = {
+        "job_id": job_id,
+        "status": "queued",
+        "stage": "queued",
+        "events": [{"stage": "queued", "at": time.time()}],
+        "result": None,
+        "error": None
+    }
+    task = asyncio.create_task(run_analysis_job(job, cv_id, jd_id))
+    analysis_tasks.add(task)
+    task.add_done_callback(analysis_tasks.discard)
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/analysis-jobs/{job_id}", response_model=AnalysisJobStatus)
+async def get_analysis_job(job_id: str):
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return AnalysisJobStatus(**job)
+
+@app.post("/blobs", status_code=201)
+async def create_blob(request: BlobRequest):
+    """Store a CV or JD text once; analysis requests can then send its id"""
+    text_id = await asyncio.to_thread(blob_store.put, request.text)
+    return {"id": text_id, "size": len(request.text.encode("utf-8"))}
+
+@app.get("/blobs/stats")
+async def blob_stats():
+    return await asyncio.to_thread(blob_store.stats)
+
+@app.get("/call-policy/metrics")
+async def call_policy_metrics():
+    return {stage: policy.metrics() for stage, policy in POLICIES.items()}
+
+@app.get("/single-flight/stats")
+async def single_flight_stats():
+    return single_flight.metrics()
+
+@app.get("/question-bank/stats")
+async def question_bank_stats():
+    return question_bank().stats()
+
+@app.post("/handoffs", status_code=202)
+async def create_handoff(request: HandoffRequest):
+    """Forward a candidate to the interview service"""
+    try:
+        handoff = Handoff(**request.model_dump())
+        handoff.validate()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return await asyncio.to_thread(post_handoff, handoff)
+    except Exception as e:
+        logger.error(f"Error handing off candidate: {str(e)}")
+        raise HTTPException(
+            status_code=502,
+            detail=f"Interview service unavailable: {str(e)}"
+        )
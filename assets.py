@@ -0,0 +1,103 @@
+# assets.py
+import os
+import re
+import time
+import logging
+import threading
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ASSET_DIR = os.getenv('ASSET_DIR', os.path.dirname(os.path.abspath(__file__)))
+# Per-role overrides live in <ASSET_DIR>/roles/<role>/<file>, by the role name
+# recruiters give at handoff (not the JD's content hash, which changes on edit)
+ROLE_DIR = 'roles'
+ROLE_NAME = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]{0,63}')
+# Minimum seconds between mtime checks of a file
+CHECK_INTERVAL = 2.0
+
+DEFAULT_STARTERS = ("Here's your next question.",)
+FIRST_QUESTION_STARTER = 'Thank you for joining. Here’s your first question.'
+
+def is_role_name(role) -> bool:
+    """Whether a role name is usable as its asset directory name."""
+    return isinstance(role, str) and ROLE_NAME.fullmatch(role) is not None and '..' not in role
+
+class AssetRegistry:
+    """
+    Static text assets loaded once, validated, and reloaded when their mtime
+    changes. mtime checks are throttled, so hot paths do not touch the
+    filesystem on every call.
+    """
+
+    def __init__(self, base_dir: str = ASSET_DIR, check_interval: float = CHECK_INTERVAL):
+        self.base_dir = base_dir
+        self.check_interval = check_interval
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def _path(self, name: str, role: Optional[str]) -> str:
+        # Role names come from handoffs; never let one escape the role directory
+        if role and is_role_name(role):
+            role_path = os.path.join(self.base_dir, ROLE_DIR, role, name)
+            if os.path.exists(role_path):
+                return role_path
+        return os.path.join(self.base_dir, name)
+
+    def _load(self, path: str):
+        """Current (text, lines) of a file, or None if it is missing."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and now - entry['checked'] < self.check_interval:
+                return entry['value']
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if entry and entry['mtime'] == mtime:
+                entry['checked'] = now
+                return entry['value']
+
+            value = None
+            if mtime is not None:
+                with open(path, 'r', encoding='utf-8') as f:
+                    text = f.read().strip()
+                lines = tuple(dict.fromkeys(line.strip() for line in text.splitlines() if line.strip()))
+                value = (text, lines)
+                logger.info(f"Loaded asset {path} ({len(lines)} lines)")
+            elif entry:
+                logger.warning(f"Asset {path} disappeared")
+            self.entries[path] = {'mtime': mtime, 'checked': now, 'value': value}
+            return value
+
+    def text(self, name: str, role: Optional[str] = None) -> Optional[str]:
+        """Whole file text, stripped, or None if the file is missing or empty."""
+        value = self._load(self._path(name, role))
+        return value[0] if value and value[0] else None
+
+    def lines(self, name: str, role: Optional[str] = None) -> Tuple[str, ...]:
+        """Stripped, non-empty, de-duplicated lines of a file."""
+        value = self._load(self._path(name, role))
+        return value[1] if value else ()
+
+    def job_description(self, role: Optional[str] = None) -> Optional[str]:
+        return self.text('jd.txt', role)
+
+    def question_starters(self, role: Optional[str] = None) -> Tuple[str, ...]:
+        return self.lines('question_starters.txt', role) or DEFAULT_STARTERS
+
+    def starter(self, index: int, role: Optional[str] = None) -> str:
+        """
+        Starter line for the question at a zero-based index.
+
+        The first question gets the welcome line; later questions cycle
+        through the starters, so consecutive questions never repeat one
+        while more than one is available.
+        """
+        if index == 0:
+            return FIRST_QUESTION_STARTER
+        starters = self.question_starters(role)
+        return starters[(index - 1) % len(starters)]
+
+assets = AssetRegistry()
@@ -0,0 +1,158 @@
+# blobs.py
+"""
+Content-addressed store for CV and JD texts.
+
+Each distinct text is stored once in the blobs table, compressed, under the
+sha256 of its UTF-8 bytes. That id is what results, caches and the
+interview records reference (analysis_results.cv_id/jd_id, questions.cv_id
+and questions.jd_id), and what API clients send instead of resending a
+text they have already stored.
+
+Texts are compressed with zstd when the zstandard package is installed and
+with zlib otherwise; each row records its codec, so both can be read back
+whichever is installed now (as long as zstd rows find zstandard).
+"""
+import hashlib
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Optional
+from db import connect, DB_PATH
+
+logger = logging.getLogger(__name__)
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+# Decompressed texts kept in memory; everything else stays compressed on disk
+CACHE_SIZE = int(os.getenv("BLOB_CACHE_SIZE", "64"))
+
+def blob_id(text: str) -> str:
+    """Id of a text in the store."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def default_codec() -> str:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "zlib"
+    return "zstd"
+
+def compress(text: str, codec: str) -> bytes:
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        # Imported here so zstandard stays an optional dependency
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+def decompress(data: bytes, codec: str) -> str:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+class BlobStore:
+    """
+    Compressed, deduplicated text storage in SQLite.
+
+    A small LRU of decompressed texts serves repeated reads, e.g. one JD
+    analyzed against many CVs, so memory stays bounded by CACHE_SIZE texts.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, codec: str = None, cache_size: int = CACHE_SIZE):
+        self.db_path = db_path
+        self.codec = codec or os.getenv("BLOB_CODEC") or default_codec()
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, text: str) -> str:
+        """Store a text if it is new; returns its id."""
+        text_id = blob_id(text)
+        if self._cached(text_id) is None:
+            conn = connect(self.db_path)
+            # OR IGNORE: a text stored twice keeps its first copy
+            conn.execute('''
+            INSERT OR IGNORE INTO blobs (id, codec, size, data, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (
+                text_id,
+                self.codec,
+                len(text.encode("utf-8")),
+                compress(text, self.codec),
+                datetime.utcnow().isoformat()
+            ))
+            conn.commit()
+            conn.close()
+            self._remember(text_id, text)
+        return text_id
+
+    def get(self, text_id: str) -> str:
+        """
+        The text stored under an id.
+
+        Raises:
+            KeyError: If no text is stored under the id
+        """
+        text = self._cached(text_id)
+        if text is not None:
+            return text
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT codec, data FROM blobs WHERE id = ?', (text_id,))
+        row = cursor.fetchone()
+        conn.close()
+        if row is None:
+            raise KeyError(text_id)
+        text = decompress(row[1], row[0])
+        self._remember(text_id, text)
+        return text
+
+    def missing(self, text_ids: Iterable[str]) -> list:
+        """The ids, of those given, that are not stored."""
+        text_ids = list(dict.fromkeys(text_ids))
+        if not text_ids:
+            return []
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT id FROM blobs WHERE id IN ({', '.join('?' * len(text_ids))})",
+            text_ids
+        )
+        stored = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return [text_id for text_id in text_ids if text_id not in stored]
+
+    def _cached(self, text_id: str) -> Optional[str]:
+        with self.lock:
+            text = self.cache.get(text_id)
+            if text is not None:
+                self.cache.move_to_end(text_id)
+            return text
+
+    def _remember(self, text_id: str, text: str):
+        with self.lock:
+            self.cache[text_id] = text
+            self.cache.move_to_end(text_id)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT codec, COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs GROUP BY codec')
+        codecs = {codec: {"blobs": count, "bytes": size, "stored_bytes": stored} for codec, count, size, stored in cursor.fetchall()}
+        conn.close()
+        size = sum(codec["bytes"] for codec in codecs.values())
+        stored = sum(codec["stored_bytes"] for codec in codecs.values())
+        return {
+            "blobs": sum(codec["blobs"] for codec in codecs.values()),
+            "bytes": size,
+            "stored_bytes": stored,
+            "compression_ratio": round(size / stored, 2) if stored else None,
+            "cached": len(self.cache),
+            "codecs": codecs
+        }
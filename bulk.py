@@ -0,0 +1,222 @@
+# bulk.py
+"""
+Bulk CV screening against one JD.
+
+CVs from a ZIP or multi-file upload are extracted in a process pool and
+analyzed through the API with bounded concurrency. Extracted text is only
+held between extraction and the end of its API call, so memory stays flat
+however many CVs are uploaded; rows keep the scores, not the texts.
+"""
+import csv
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, List, Tuple
+from extraction import SUPPORTED_EXTENSIONS, extract_document, file_extension
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_WORKERS = int(os.getenv("BULK_EXTRACTION_WORKERS", str(os.cpu_count() or 2)))
+# Concurrent /analyze-profile calls per bulk run
+API_CONCURRENCY = int(os.getenv("BULK_API_CONCURRENCY", "8"))
+API_TIMEOUT = float(os.getenv("BULK_API_TIMEOUT", "300"))
+# Limits on what one ZIP upload may expand to
+MAX_ARCHIVE_MEMBERS = int(os.getenv("BULK_MAX_ARCHIVE_MEMBERS", "5000"))
+MAX_MEMBER_BYTES = int(os.getenv("BULK_MAX_MEMBER_MB", "20")) * 1024 * 1024
+EXPORT_FIELDS = (
+    "file", "status", "compatibility_score", "next_steps",
+    "strengths", "potential_concerns", "sha256", "error"
+)
+
+def extraction_pool(workers: int = EXTRACTION_WORKERS) -> ProcessPoolExecutor:
+    # spawn, because forking a threaded Streamlit server is unsafe
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def iter_cv_files(uploads: Iterable) -> Iterator[Tuple[str, bytes, str]]:
+    """
+    Yield (name, bytes, error) for each supported CV, expanding ZIP archives.
+
+    Archive members are read one at a time, as they are consumed. Members
+    over MAX_MEMBER_BYTES, and archives with more than MAX_ARCHIVE_MEMBERS
+    entries, are yielded with no bytes and an error instead of being read.
+    """
+    for upload in uploads:
+        extension = file_extension(upload.name)
+        if extension == "zip":
+            with zipfile.ZipFile(upload) as archive:
+                members = archive.infolist()
+                if len(members) > MAX_ARCHIVE_MEMBERS:
+                    yield upload.name, None, f"Archive has {len(members)} entries; the limit is {MAX_ARCHIVE_MEMBERS}"
+                    continue
+                for member in members:
+                    name = os.path.basename(member.filename)
+                    if member.is_dir() or name.startswith(".") or file_extension(name) not in SUPPORTED_EXTENSIONS:
+                        continue
+                    # zipfile stops decompressing at the declared file_size,
+                    # so checking it bounds what read() can return
+                    if member.file_size > MAX_MEMBER_BYTES:
+                        yield name, None, f"Uncompressed size {member.file_size} bytes is over the {MAX_MEMBER_BYTES} byte limit"
+                        continue
+                    yield name, archive.read(member), None
+        elif extension in SUPPORTED_EXTENSIONS:
+            yield upload.name, upload.getvalue(), None
+
+class BulkRun:
+    """
+    One bulk screening run, executed on a background thread.
+
+    rows is appended to and updated in place as CVs progress; read it
+    through snapshot() from other threads.
+    """
+
+    def __init__(self, uploads: list, analyze, pool: ProcessPoolExecutor,
+                 concurrency: int = API_CONCURRENCY):
+        self.uploads = uploads
+        # analyze(cv_text) -> API result, bound to the run's JD by the caller
+        self.analyze = analyze
+        self.pool = pool
+        self.concurrency = concurrency
+        self.rows: List[dict] = []
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.started_at = None
+        self.elapsed = 0.0
+
+    def snapshot(self) -> List[dict]:
+        with self.lock:
+            return [dict(row) for row in self.rows]
+
+    def counts(self) -> dict:
+        with self.lock:
+            counts = {}
+            for row in self.rows:
+                counts[row["status"]] = counts.get(row["status"], 0) + 1
+            return counts
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _update(self, rows: list, **fields):
+        with self.lock:
+            for row in rows:
+                row.update(fields)
+
+    def run(self):
+        self.started_at = time.monotonic()
+        try:
+            self._run()
+        except Exception as e:
+            logger.error(f"Bulk run failed: {str(e)}")
+        finally:
+            self.elapsed = time.monotonic() - self.started_at
+            self.finished.set()
+
+    def _run(self):
+        sources = iter_cv_files(self.uploads)
+        extracting = {}
+        analyzing = {}
+        ready = deque()
+        # Rows waiting on each CV hash; identical CVs are analyzed once
+        by_hash = {}
+        exhausted = False
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as api_pool:
+            while True:
+                # Keep just enough CVs extracted ahead of the API calls
+                while not exhausted and not self.cancelled.is_set() \
+                        and len(extracting) + len(ready) < 2 * self.concurrency:
+                    try:
+                        name, data, error = next(sources)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    row = {field: None for field in EXPORT_FIELDS}
+                    row.update(file=name, status="extracting")
+                    if error:
+                        row.update(status="failed", error=error)
+                    with self.lock:
+                        self.rows.append(row)
+                    if error:
+                        continue
+                    extracting[self.pool.submit(extract_document, name, data)] = row
+
+                while ready and len(analyzing) < self.concurrency and not self.cancelled.is_set():
+                    sha256, text = ready.popleft()
+                    self._update(by_hash[sha256], status="analyzing")
+                    analyzing[api_pool.submit(self.analyze, text)] = sha256
+
+                if not extracting and not analyzing:
+                    if exhausted or self.cancelled.is_set():
+                        break
+                    continue
+
+                done, _ = wait(list(extracting) + list(analyzing), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in extracting:
+                        row = extracting.pop(future)
+                        document = future.result()
+                        self._update([row], sha256=document["sha256"])
+                        if document["error"]:
+                            self._update([row], status="failed", error=document["error"])
+                        elif document["sha256"] in by_hash:
+                            # Same CV as an earlier file; takes that file's result
+                            waiting = by_hash[document["sha256"]]
+                            with self.lock:
+                                waiting.append(row)
+                                source = waiting[0]
+                                row.update({field: source[field] for field in EXPORT_FIELDS if field != "file"})
+                        else:
+                            by_hash[document["sha256"]] = [row]
+                            self._update([row], status="queued")
+                            ready.append((document["sha256"], document["text"]))
+                    else:
+                        sha256 = analyzing.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            self._update(by_hash[sha256], status="failed", error=str(e))
+                            continue
+                        self._update(
+                            by_hash[sha256],
+                            status="done",
+                            compatibility_score=result["compatibility_score"],
+                            next_steps=result["next_steps"],
+                            strengths="; ".join(result["strengths"]),
+                            potential_concerns="; ".join(result["potential_concerns"])
+                        )
+
+            if self.cancelled.is_set():
+                with self.lock:
+                    for row in self.rows:
+                        if row["status"] in ("extracting", "queued", "analyzing"):
+                            row["status"] = "cancelled"
+
+def to_csv(rows: List[dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+def to_parquet(rows: List[dict]) -> bytes:
+    # pyarrow ships with Streamlit; only needed when exporting
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pylist(
+        [{field: row.get(field) for field in EXPORT_FIELDS} for row in rows],
+        schema=pa.schema([
+            (field, pa.int64() if field == "compatibility_score" else pa.string())
+            for field in EXPORT_FIELDS
+        ])
+    )
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+    return buffer.getvalue()
@@ -0,0 +1,173 @@
+# call_policy.py
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Error class names (anywhere in the MRO) worth retrying, as raised by
+# litellm/openai under crewai, without importing either here
+TRANSIENT_ERRORS = {
+    "RateLimitError", "APIConnectionError", "APITimeoutError", "Timeout",
+    "ServiceUnavailableError", "InternalServerError", "ConnectionError", "TimeoutError"
+}
+HEDGING = os.getenv("CALL_HEDGING", "false").lower() == "true"
+# Latency samples needed before the p95 is trusted for hedging
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# Crew calls run here so a caller can stop waiting at its deadline
+executor = ThreadPoolExecutor(max_workers=int(os.getenv("CALL_POLICY_WORKERS", "32")), thread_name_prefix="crew-call")
+
+class DeadlineExceeded(Exception):
+    """A stage did not produce a usable result within its deadline"""
+
+class InvalidOutput(Exception):
+    """A stage's output still failed validation after re-prompting"""
+
+def is_transient(error: Exception) -> bool:
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+def percentile(samples: list, fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class CallPolicy:
+    """
+    Deadline, retry, re-prompt and hedging policy for one pipeline stage.
+
+    call(feedback, hedged) performs one LLM call and returns its raw text.
+    feedback is the previous parse error, to be included in the prompt, and
+    hedged is True for a duplicate request started because the first one
+    was slower than the stage's p95; it must not share agents with it.
+    """
+
+    def __init__(self, stage: str, deadline: float, max_attempts: int = 3, backoff_base: float = 1.0,
+                 max_reprompts: int = 1, hedging: bool = HEDGING):
+        self.stage = stage
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.max_reprompts = max_reprompts
+        self.hedging = hedging
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys((
+            "calls", "attempts", "retries", "reprompts", "hedges", "hedge_wins",
+            "wasted_calls", "deadline_exceeded", "failures", "parse_failures", "escalations"
+        ), 0)
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def hedge_after(self) -> Optional[float]:
+        """Seconds after which to send a duplicate request, if hedging applies"""
+        if not self.hedging:
+            return None
+        with self.lock:
+            samples = list(self.latencies)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return percentile(samples, 0.95)
+
+    def run(self, call: Callable[[Optional[str], bool], str], parse: Callable[[str], dict]) -> dict:
+        """
+        Run call until parse accepts its output. parse raises ValueError
+        (including pydantic's ValidationError) to reject it.
+
+        Raises:
+            DeadlineExceeded: If the stage deadline passes first
+            InvalidOutput: If the output still does not parse after re-prompting
+            Exception: The last error, once it is not transient or retries run out
+        """
+        self.count("calls")
+        deadline = time.monotonic() + self.deadline
+        feedback = None
+        attempt = 0
+        reprompts = 0
+        while True:
+            attempt += 1
+            self.count("attempts")
+            try:
+                text = self._attempt(call, feedback, deadline)
+            except DeadlineExceeded:
+                self.count("deadline_exceeded")
+                raise
+            except Exception as e:
+                if not is_transient(e) or attempt >= self.max_attempts:
+                    self.count("failures")
+                    raise
+                # Full jitter keeps concurrent retries from lining up
+                delay = random.uniform(0, self.backoff_base * 2 ** (attempt - 1))
+                if time.monotonic() + delay >= deadline:
+                    self.count("deadline_exceeded")
+                    raise DeadlineExceeded(f"{self.stage}: no time left to retry after {e}")
+                logger.warning(f"{self.stage} attempt {attempt} failed ({e}); retrying in {delay:.1f}s")
+                self.count("retries")
+                time.sleep(delay)
+                continue
+
+            try:
+                return parse(text)
+            except ValueError as e:
+                self.count("wasted_calls")
+                if reprompts >= self.max_reprompts:
+                    self.count("parse_failures")
+                    raise InvalidOutput(f"{self.stage} output failed validation: {e}") from e
+                reprompts += 1
+                self.count("reprompts")
+                feedback = str(e)
+                logger.warning(f"{self.stage} output did not parse ({e}); re-prompting")
+
+    def _attempt(self, call, feedback: Optional[str], deadline: float) -> str:
+        started = time.monotonic()
+        primary = executor.submit(call, feedback, False)
+        pending = {primary}
+        hedge_after = self.hedge_after()
+        if hedge_after is not None and started + hedge_after < deadline:
+            done, _ = wait(pending, timeout=hedge_after)
+            if not done:
+                self.count("hedges")
+                logger.info(f"{self.stage} slower than p95 ({hedge_after:.2f}s); sending a hedged request")
+                pending.add(executor.submit(call, feedback, True))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                # Abandoned: the calls run to completion but nobody uses them
+                self.count("wasted_calls", len(pending))
+                raise DeadlineExceeded(f"{self.stage} exceeded its {self.deadline:g}s deadline")
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                with self.lock:
+                    self.latencies.append(time.monotonic() - started)
+                if future is not primary:
+                    self.count("hedge_wins")
+                for loser in pending:
+                    if not loser.cancel():
+                        self.count("wasted_calls")
+                return future.result()
+        raise error
+
+    def metrics(self) -> dict:
+        with self.lock:
+            samples = list(self.latencies)
+            metrics = dict(self.counters)
+        metrics.update(
+            latency_p50=percentile(samples, 0.5),
+            latency_p95=percentile(samples, 0.95),
+            latency_p99=percentile(samples, 0.99),
+            latency_max=max(samples) if samples else None
+        )
+        return metrics
@@ -0,0 +1,373 @@
+# db.py
+import sqlite3
+import logging
+import sys
+from monitoring import TimedConnection, statement_stats
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = 'interviews.db'
+
+# STRICT tables need SQLite 3.37+; older libraries get plain typed tables
+STRICT = " STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else ""
+
+def _baseline(cursor):
+    """Version 1: the original interview tables."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS questions (
+        candidate_id TEXT PRIMARY KEY,
+        phone_number TEXT,
+        questions TEXT,
+        created_at TIMESTAMP,
+        status TEXT DEFAULT 'pending',
+        interview_complete BOOLEAN DEFAULT FALSE
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS chat_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate_id TEXT,
+        question TEXT,
+        answer TEXT,
+        timestamp TIMESTAMP
+    )
+    ''')
+
+def _normalize_questions(cursor):
+    """Version 2: one row per question, STRICT typed tables and lookup indexes."""
+    cursor.execute(f'''
+    CREATE TABLE questions_v2 (
+        candidate_id TEXT PRIMARY KEY,
+        phone_number TEXT,
+        created_at TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        interview_complete INTEGER NOT NULL DEFAULT 0
+    ){STRICT}
+    ''')
+    cursor.execute('''
+    INSERT INTO questions_v2 (candidate_id, phone_number, created_at, status, interview_complete)
+    SELECT candidate_id, phone_number, created_at,
+           COALESCE(status, 'pending'), COALESCE(interview_complete, 0)
+    FROM questions
+    ''')
+
+    cursor.execute(f'''
+    CREATE TABLE interview_questions (
+        candidate_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        question TEXT NOT NULL,
+        PRIMARY KEY (candidate_id, position)
+    ){STRICT}
+    ''')
+    cursor.execute('''
+    INSERT INTO interview_questions (candidate_id, position, question)
+    SELECT q.candidate_id, CAST(j.key AS INTEGER), j.value
+    FROM questions q, json_each(q.questions) j
+    WHERE json_valid(q.questions)
+    ''')
+
+    cursor.execute(f'''
+    CREATE TABLE chat_history_v2 (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate_id TEXT NOT NULL,
+        question TEXT,
+        answer TEXT,
+        timestamp TEXT
+    ){STRICT}
+    ''')
+    cursor.execute('''
+    INSERT INTO chat_history_v2 (id, candidate_id, question, answer, timestamp)
+    SELECT id, candidate_id, question, answer, timestamp FROM chat_history
+    ''')
+
+    cursor.execute('DROP TABLE questions')
+    cursor.execute('ALTER TABLE questions_v2 RENAME TO questions')
+    cursor.execute('DROP TABLE chat_history')
+    cursor.execute('ALTER TABLE chat_history_v2 RENAME TO chat_history')
+
+    cursor.execute('CREATE INDEX idx_chat_history_candidate_ts ON chat_history (candidate_id, timestamp)')
+    cursor.execute('CREATE INDEX idx_questions_status ON questions (status)')
+
+    # Archive tables, previously created lazily by the dashboard cleanup
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS archived_questions (
+        candidate_id TEXT PRIMARY KEY,
+        phone_number TEXT,
+        questions TEXT,
+        created_at TIMESTAMP,
+        status TEXT,
+        interview_complete BOOLEAN,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS archived_chat_history (
+        id INTEGER PRIMARY KEY,
+        candidate_id TEXT,
+        question TEXT,
+        answer TEXT,
+        timestamp TIMESTAMP,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+def _entity_cache(cursor):
+    """Version 3: persisted Telegram entities for sender resolution."""
+    cursor.execute(f'''
+    CREATE TABLE entity_cache (
+        user_id TEXT PRIMARY KEY,
+        access_hash INTEGER NOT NULL,
+        phone_number TEXT,
+        updated_at TEXT
+    ){STRICT}
+    ''')
+    cursor.execute('CREATE INDEX idx_entity_cache_phone ON entity_cache (phone_number)')
+
+def _outbox(cursor):
+    """Version 4: durable outbound message queue with delivery status."""
+    cursor.execute(f'''
+    CREATE TABLE outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        intent_key TEXT NOT NULL UNIQUE,
+        chat_id TEXT NOT NULL,
+        text TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        created_at TEXT,
+        sent_at TEXT
+    ){STRICT}
+    ''')
+    cursor.execute('CREATE INDEX idx_outbox_status ON outbox (status, id)')
+
+def _timers(cursor):
+    """Version 5: idle-interview timers and persisted interview progress."""
+    cursor.execute(f'''
+    CREATE TABLE timers (
+        candidate_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        due_at REAL NOT NULL,
+        PRIMARY KEY (candidate_id, kind)
+    ){STRICT}
+    ''')
+    cursor.execute('ALTER TABLE questions ADD COLUMN current_index INTEGER NOT NULL DEFAULT 0')
+
+def _handoffs(cursor):
+    """Version 6: durable handoff queue from the recruiter apps to the bot."""
+    cursor.execute(f'''
+    CREATE TABLE handoffs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        phone_number TEXT NOT NULL,
+        questions TEXT NOT NULL,
+        candidate_ref TEXT,
+        jd_id TEXT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        error TEXT,
+        created_at TEXT,
+        processed_at TEXT
+    ){STRICT}
+    ''')
+    cursor.execute('CREATE INDEX idx_handoffs_status ON handoffs (status, id)')
+    cursor.execute('ALTER TABLE questions ADD COLUMN candidate_ref TEXT')
+    cursor.execute('ALTER TABLE questions ADD COLUMN jd_id TEXT')
+
+def _analysis_leases(cursor):
+    """Version 7: single-flight leases and results for identical analysis requests."""
+    cursor.execute(f'''
+    CREATE TABLE analysis_leases (
+        key TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        status TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        result TEXT,
+        error TEXT,
+        updated_at REAL NOT NULL
+    ){STRICT}
+    ''')
+
+def _reporting_tables(cursor):
+    """Version 8: append-only analysis results for the reporting export."""
+    cursor.execute(f'''
+    CREATE TABLE analysis_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        request_key TEXT NOT NULL,
+        jd_id TEXT NOT NULL,
+        cv_id TEXT NOT NULL,
+        compatibility_score INTEGER NOT NULL,
+        next_steps TEXT,
+        result TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    ){STRICT}
+    ''')
+    cursor.execute(f'''
+    CREATE TABLE response_scores (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate_id TEXT,
+        jd_id TEXT,
+        first_chat_id INTEGER,
+        last_chat_id INTEGER,
+        answers INTEGER NOT NULL,
+        overall_score REAL,
+        clarity REAL,
+        completeness REAL,
+        relevance REAL,
+        result TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    ){STRICT}
+    ''')
+
+def _blobs(cursor):
+    """Version 9: content-addressed CV/JD texts, referenced by id."""
+    cursor.execute(f'''
+    CREATE TABLE blobs (
+        id TEXT PRIMARY KEY,
+        codec TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        data BLOB NOT NULL,
+        created_at TEXT NOT NULL
+    ){STRICT}
+    ''')
+    cursor.execute('ALTER TABLE handoffs ADD COLUMN cv_id TEXT')
+    cursor.execute('ALTER TABLE questions ADD COLUMN cv_id TEXT')
+
+def _archive_sequence(cursor):
+    """Version 10: archive order and JD/CV ids on archived rows, for the reporting export."""
+    # archive_seq numbers rows in the order they are archived; the original
+    # ids and candidate ids stay unique so re-archiving replaces the row.
+    # Not STRICT, so legacy archived values that do not fit the types still copy.
+    cursor.execute('''
+    CREATE TABLE archived_questions_v2 (
+        archive_seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate_id TEXT NOT NULL UNIQUE,
+        phone_number TEXT,
+        questions TEXT,
+        created_at TEXT,
+        status TEXT,
+        interview_complete INTEGER,
+        jd_id TEXT,
+        cv_id TEXT,
+        archived_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute('''
+    INSERT INTO archived_questions_v2
+        (candidate_id, phone_number, questions, created_at, status, interview_complete, archived_at)
+    SELECT candidate_id, phone_number, questions, created_at, status, interview_complete, archived_at
+    FROM archived_questions ORDER BY archived_at, rowid
+    ''')
+    cursor.execute('DROP TABLE archived_questions')
+    cursor.execute('ALTER TABLE archived_questions_v2 RENAME TO archived_questions')
+
+    cursor.execute('''
+    CREATE TABLE archived_chat_history_v2 (
+        archive_seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        id INTEGER NOT NULL UNIQUE,
+        candidate_id TEXT,
+        jd_id TEXT,
+        cv_id TEXT,
+        question TEXT,
+        answer TEXT,
+        timestamp TEXT,
+        archived_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute('''
+    INSERT INTO archived_chat_history_v2 (id, candidate_id, question, answer, timestamp, archived_at)
+    SELECT id, candidate_id, question, answer, timestamp, archived_at
+    FROM archived_chat_history ORDER BY archived_at, id
+    ''')
+    cursor.execute('DROP TABLE archived_chat_history')
+    cursor.execute('ALTER TABLE archived_chat_history_v2 RENAME TO archived_chat_history')
+
+def _lease_error_type(cursor):
+    """Version 11: exception type of a failed single-flight computation."""
+    cursor.execute('ALTER TABLE analysis_leases ADD COLUMN error_type TEXT')
+
+def _handoff_retries(cursor):
+    """Version 12: attempt count and backoff for handoffs that failed transiently."""
+    cursor.execute('ALTER TABLE handoffs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('ALTER TABLE handoffs ADD COLUMN next_attempt_at REAL')
+
+def _roles(cursor):
+    """Version 13: stable role names for candidates, and each role's current JD."""
+    cursor.execute('ALTER TABLE handoffs ADD COLUMN role TEXT')
+    cursor.execute('ALTER TABLE questions ADD COLUMN role TEXT')
+    cursor.execute(f'''
+    CREATE TABLE roles (
+        name TEXT PRIMARY KEY,
+        jd_id TEXT NOT NULL,
+        updated_at TEXT
+    ){STRICT}
+    ''')
+
+# Ordered migrations; PRAGMA user_version holds the number applied
+MIGRATIONS = [
+    _baseline,
+    _normalize_questions,
+    _entity_cache,
+    _outbox,
+    _timers,
+    _handoffs,
+    _analysis_leases,
+    _reporting_tables,
+    _blobs,
+    _archive_sequence,
+    _lease_error_type,
+    _handoff_retries,
+    _roles,
+]
+
+_migrated_paths = set()
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Apply pending migrations, each in its own transaction.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+
+    Returns:
+        int: Schema version after migrating
+    """
+    version = schema_version(conn)
+    for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            # Another process (bot, API, dashboard) may have applied it
+            # while this one waited for the write lock
+            if schema_version(conn) >= number:
+                cursor.execute('COMMIT')
+                continue
+            migration(cursor)
+            cursor.execute(f'PRAGMA user_version = {number}')
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+        logger.info(f"Applied schema migration {number}: {migration.__name__}")
+    return schema_version(conn)
+
+def connect(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """Open the interview database, migrating it on first use in this process."""
+    if statement_stats.enabled:
+        conn = sqlite3.connect(db_path, factory=TimedConnection)
+    else:
+        conn = sqlite3.connect(db_path)
+    if db_path not in _migrated_paths:
+        migrate(conn)
+        if db_path != ':memory:':
+            _migrated_paths.add(db_path)
+    return conn
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    logging.basicConfig(level=logging.INFO)
+    conn = sqlite3.connect(path)
+    before = schema_version(conn)
+    after = migrate(conn)
+    conn.close()
+    print(f"{path}: schema version {before} -> {after} (latest {len(MIGRATIONS)})")
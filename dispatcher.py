@@ -0,0 +1,102 @@
+# dispatcher.py
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+# Events accepted but not yet handled before submitters are made to wait
+DEFAULT_MAX_PENDING = 1000
+
+class ChatDispatcher:
+    """
+    Bounded worker pool with strict per-chat ordering.
+
+    Events are queued per chat id. A chat is handed to at most one worker at a
+    time, so events from the same chat are handled in arrival order, while
+    different chats are handled in parallel. When max_pending events are
+    waiting, submit() blocks, which pushes back on the update source.
+    """
+
+    def __init__(self, handler: Callable[[object], Awaitable[None]],
+                 workers: int = DEFAULT_WORKERS, max_pending: int = DEFAULT_MAX_PENDING):
+        self.handler = handler
+        self.worker_count = workers
+        self.max_pending = max_pending
+        self.queues = {}
+        self.ready = asyncio.Queue()
+        self.capacity = asyncio.Semaphore(max_pending)
+        self.workers = []
+        self.pending = 0
+        self.busy = 0
+        self.handled = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+
+    async def start(self):
+        self.workers = [
+            asyncio.create_task(self._worker(), name=f"dispatcher-{i}")
+            for i in range(self.worker_count)
+        ]
+        logger.info(f"Dispatcher started with {self.worker_count} workers")
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def submit(self, chat_id: Hashable, event):
+        """Queue an event for its chat, waiting while the dispatcher is full."""
+        await self.capacity.acquire()
+        queue = self.queues.get(chat_id)
+        if queue is None:
+            # Not queued or running: schedule the chat
+            queue = self.queues[chat_id] = deque()
+            self.ready.put_nowait(chat_id)
+        queue.append((time.monotonic(), event))
+        self.pending += 1
+        self.max_depth = max(self.max_depth, len(queue))
+
+    async def _worker(self):
+        while True:
+            chat_id = await self.ready.get()
+            queue = self.queues[chat_id]
+            queued_at, event = queue.popleft()
+            self.pending -= 1
+            self.busy += 1
+            self.total_wait += time.monotonic() - queued_at
+            try:
+                await self.handler(event)
+                self.handled += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error handling event for chat {chat_id}: {e}")
+            finally:
+                self.busy -= 1
+                self.capacity.release()
+                if queue:
+                    # More events for this chat: requeue behind other chats
+                    self.ready.put_nowait(chat_id)
+                else:
+                    del self.queues[chat_id]
+
+    def metrics(self) -> dict:
+        """Queue depth and throughput counters."""
+        processed = self.handled + self.failed
+        return {
+            "pending": self.pending,
+            "busy_workers": self.busy,
+            "workers": self.worker_count,
+            "queued_chats": len(self.queues),
+            "deepest_chat_queue": max((len(q) for q in self.queues.values()), default=0),
+            "max_chat_depth_seen": self.max_depth,
+            "handled": self.handled,
+            "failed": self.failed,
+            "avg_queue_wait": self.total_wait / processed if processed else 0.0,
+            "saturated": self.pending >= self.max_pending
+        }
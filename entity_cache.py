@@ -0,0 +1,116 @@
+# entity_cache.py
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional
+from telethon.tl.types import InputPeerUser
+from db import connect, DB_PATH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 10_000
+
+class CachedEntity(NamedTuple):
+    user_id: str
+    access_hash: int
+    phone_number: Optional[str]
+
+class EntityCache:
+    """
+    LRU cache of Telegram user entities keyed by user id and phone number,
+    backed by the entity_cache table so it survives restarts.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, capacity: int = DEFAULT_CAPACITY):
+        self.db_path = db_path
+        self.capacity = capacity
+        self.by_id = OrderedDict()
+        self.by_phone = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, entity: CachedEntity):
+        self.by_id[entity.user_id] = entity
+        self.by_id.move_to_end(entity.user_id)
+        if entity.phone_number:
+            self.by_phone[entity.phone_number] = entity.user_id
+        while len(self.by_id) > self.capacity:
+            _, evicted = self.by_id.popitem(last=False)
+            if evicted.phone_number and self.by_phone.get(evicted.phone_number) == evicted.user_id:
+                del self.by_phone[evicted.phone_number]
+
+    def warm(self):
+        """Load cached entities of registered candidates, most recent first."""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT e.user_id, e.access_hash, COALESCE(e.phone_number, q.phone_number)
+        FROM questions q
+        JOIN entity_cache e ON e.user_id = q.candidate_id
+        ORDER BY q.created_at DESC
+        LIMIT ?
+        ''', (self.capacity,))
+        rows = cursor.fetchall()
+        conn.close()
+        # Insert oldest first so the most recent end up most recently used
+        for row in reversed(rows):
+            self._remember(CachedEntity(*row))
+        logger.info(f"Entity cache warmed with {len(rows)} entities")
+
+    def _load(self, column: str, value: str) -> Optional[CachedEntity]:
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            f'SELECT user_id, access_hash, phone_number FROM entity_cache WHERE {column} = ?',
+            (value,)
+        )
+        row = cursor.fetchone()
+        conn.close()
+        return CachedEntity(*row) if row else None
+
+    def get(self, user_id: str) -> Optional[CachedEntity]:
+        entity = self.by_id.get(user_id)
+        if entity is None:
+            entity = self._load('user_id', user_id)
+            if entity is None:
+                self.misses += 1
+                return None
+        self.hits += 1
+        self._remember(entity)
+        return entity
+
+    def get_by_phone(self, phone_number: str) -> Optional[CachedEntity]:
+        user_id = self.by_phone.get(phone_number)
+        if user_id is not None:
+            return self.get(user_id)
+        entity = self._load('phone_number', phone_number)
+        if entity is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(entity)
+        return entity
+
+    def put(self, user_id: str, access_hash: int, phone_number: Optional[str] = None):
+        """Cache an entity in memory and persist it."""
+        entity = CachedEntity(user_id, access_hash, phone_number)
+        self._remember(entity)
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT INTO entity_cache (user_id, access_hash, phone_number, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            access_hash = excluded.access_hash,
+            phone_number = COALESCE(excluded.phone_number, entity_cache.phone_number),
+            updated_at = excluded.updated_at
+        ''', (user_id, access_hash, phone_number, datetime.utcnow().isoformat()))
+        conn.commit()
+        conn.close()
+
+    def input_peer(self, user_id: str):
+        """InputPeerUser for a cached user, or the bare id for Telethon to resolve."""
+        entity = self.get(user_id)
+        if entity is None:
+            return int(user_id)
+        return InputPeerUser(int(entity.user_id), entity.access_hash)
@@ -0,0 +1,54 @@
+# extraction.py
+"""
+Text extraction for uploaded CVs and JDs.
+
+Functions here take bytes and return plain data, so they can run in worker
+processes as well as in the Streamlit script thread.
+"""
+import hashlib
+import io
+from lazy import pypdf2
+
+SUPPORTED_EXTENSIONS = ('pdf', 'txt')
+
+def file_extension(file_name: str) -> str:
+    return file_name.rsplit('.', 1)[-1].lower()
+
+def extract_text_from_pdf(data: bytes) -> str:
+    pdf_reader = pypdf2().PdfReader(io.BytesIO(data))
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text()
+    return text.strip()
+
+def extract_text(data: bytes, file_name: str) -> str:
+    """
+    Extract text from an uploaded PDF or TXT file's bytes.
+
+    Raises:
+        ValueError: If the format is unsupported or no text could be read
+    """
+    extension = file_extension(file_name)
+    if extension == 'pdf':
+        text = extract_text_from_pdf(data)
+    elif extension == 'txt':
+        text = data.decode('utf-8').strip()
+    else:
+        raise ValueError(f"Unsupported file format: {extension}")
+    if not text:
+        raise ValueError(f"No text found in {file_name}")
+    return text
+
+def extract_document(file_name: str, data: bytes) -> dict:
+    """
+    Hash and extract one file; never raises, for use in a process pool.
+
+    Returns:
+        dict: {"name", "sha256", "text", "error"}
+    """
+    document = {"name": file_name, "sha256": hashlib.sha256(data).hexdigest(), "text": None, "error": None}
+    try:
+        document["text"] = extract_text(data, file_name)
+    except Exception as e:
+        document["error"] = str(e)
+    return document
@@ -0,0 +1,281 @@
+# handoff.py
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Callable, List, Optional
+from db import connect
+from assets import is_role_name
+from monitoring import is_busy
+
+logger = logging.getLogger(__name__)
+
+HANDOFF_HOST = os.getenv('HANDOFF_HOST', '127.0.0.1')
+HANDOFF_PORT = int(os.getenv('HANDOFF_PORT', '8765'))
+HANDOFF_URL = f"http://{HANDOFF_HOST}:{HANDOFF_PORT}/handoffs"
+MAX_BODY_BYTES = 1_000_000
+# Attempts before a transiently failing handoff is marked failed
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 5.0
+# Error class names (anywhere in the MRO) worth retrying: Telegram and network
+# trouble, without importing telethon here
+TRANSIENT_ERRORS = {
+    "FloodWaitError", "ServerError", "TimedOutError", "RpcCallFailError",
+    "ConnectionError", "TimeoutError"
+}
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, sqlite3.OperationalError):
+        return is_busy(error)
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+@dataclass
+class Handoff:
+    """A candidate handed from a recruiter app to the interview service"""
+    phone: str
+    questions: List[str]
+    candidate_ref: Optional[str] = None
+    jd_id: Optional[str] = None
+    # Blob id of the candidate's CV text
+    cv_id: Optional[str] = None
+    # Stable role name, e.g. "backend-engineer"; selects per-role assets and maps to the role's current jd_id
+    role: Optional[str] = None
+
+    def validate(self):
+        """Raise ValueError if the handoff cannot be interviewed."""
+        if not isinstance(self.phone, str) or not self.phone.startswith('+') or not self.phone[1:].isdigit():
+            raise ValueError("phone must be in international format, e.g. +1234567890")
+        if not isinstance(self.questions, list) or not self.questions:
+            raise ValueError("questions must be a non-empty list")
+        if not all(isinstance(q, str) and q.strip() for q in self.questions):
+            raise ValueError("questions must be non-empty strings")
+        if self.role is not None and not is_role_name(self.role):
+            raise ValueError("role must be letters, digits, '-', '_' or '.', e.g. backend-engineer")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Handoff":
+        if not isinstance(data, dict):
+            raise ValueError("handoff must be a JSON object")
+        handoff = cls(
+            phone=data.get('phone'),
+            questions=data.get('questions'),
+            candidate_ref=data.get('candidate_ref'),
+            jd_id=data.get('jd_id'),
+            cv_id=data.get('cv_id'),
+            role=data.get('role')
+        )
+        handoff.validate()
+        return handoff
+
+def post_handoff(handoff: Handoff, url: str = HANDOFF_URL, timeout: float = 10.0) -> dict:
+    """
+    Submit a handoff to the running interview service.
+
+    Returns:
+        dict: {"id": <queue id>, "status": "queued"}
+    """
+    import requests
+
+    handoff.validate()
+    response = requests.post(url, json=asdict(handoff), timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+class HandoffService:
+    """
+    Local HTTP endpoint that accepts handoffs into the durable handoffs table
+    (and serves the bot's metrics), and a consumer that registers them with the interview client in order.
+    Handoffs that fail transiently (Telegram or network errors, a busy database) stay queued and are
+    retried with backoff up to MAX_ATTEMPTS; the error of the last attempt is kept on the row.
+    """
+
+    def __init__(self, interview_client, db_path: str, host: str = HANDOFF_HOST, port: int = HANDOFF_PORT,
+                 metrics: Callable[[], dict] = None):
+        self.interview_client = interview_client
+        # Served at GET /metrics, if given
+        self.metrics = metrics
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self.server = None
+        self.consumer = None
+        self.wakeup = asyncio.Event()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Rows queued before a restart are picked up by the first pass
+        self.consumer = asyncio.create_task(self._consume(), name="handoffs")
+        self.wakeup.set()
+        logger.info(f"Handoff endpoint listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.consumer is not None:
+            self.consumer.cancel()
+            await asyncio.gather(self.consumer, return_exceptions=True)
+
+    def enqueue(self, handoff: Handoff) -> int:
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT INTO handoffs (phone_number, questions, candidate_ref, jd_id, cv_id, role, status, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)
+        ''', (
+            handoff.phone,
+            json.dumps(handoff.questions),
+            handoff.candidate_ref,
+            handoff.jd_id,
+            handoff.cv_id,
+            handoff.role,
+            datetime.utcnow().isoformat()
+        ))
+        conn.commit()
+        handoff_id = cursor.lastrowid
+        conn.close()
+        self.wakeup.set()
+        return handoff_id
+
+    def status(self, handoff_id: int) -> Optional[dict]:
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT status, error, attempts FROM handoffs WHERE id = ?', (handoff_id,))
+        row = cursor.fetchone()
+        conn.close()
+        if row is None:
+            return None
+        return {"id": handoff_id, "status": row[0], "error": row[1], "attempts": row[2]}
+
+    def _next(self) -> tuple:
+        """The oldest handoff due for an attempt, and when the next retry is due."""
+        now = time.time()
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT id, phone_number, questions, candidate_ref, jd_id, cv_id, role, attempts
+        FROM handoffs
+        WHERE status = 'queued' AND (next_attempt_at IS NULL OR next_attempt_at <= ?)
+        ORDER BY id LIMIT 1
+        ''', (now,))
+        row = cursor.fetchone()
+        retry_at = None
+        if row is None:
+            cursor.execute("SELECT MIN(next_attempt_at) FROM handoffs WHERE status = 'queued'")
+            retry_at = cursor.fetchone()[0]
+        conn.close()
+        return row, retry_at
+
+    async def _consume(self):
+        retry_at = None
+        while True:
+            if retry_at is None:
+                await self.wakeup.wait()
+            else:
+                # Woken by a new handoff, or when a retry falls due
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), max(0.0, retry_at - time.time()))
+                except asyncio.TimeoutError:
+                    pass
+            self.wakeup.clear()
+            while True:
+                row, retry_at = self._next()
+                if row is None:
+                    break
+
+                handoff_id, phone, questions, candidate_ref, jd_id, cv_id, role, attempts = row
+                attempts += 1
+                next_attempt_at = None
+                try:
+                    await self.interview_client.register_candidate(
+                        phone, json.loads(questions), candidate_ref=candidate_ref,
+                        jd_id=jd_id, cv_id=cv_id, role=role
+                    )
+                    status, error = 'done', None
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    if is_transient(e) and attempts < MAX_ATTEMPTS:
+                        # Stays queued; later handoffs are not held up behind it
+                        status = 'queued'
+                        delay = getattr(e, 'seconds', None) or RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+                        next_attempt_at = time.time() + delay * random.uniform(1.0, 1.5)
+                        logger.warning(f"Handoff {handoff_id} failed (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+                    else:
+                        status = 'failed'
+
+                conn = connect(self.db_path)
+                conn.execute('''
+                UPDATE handoffs SET status = ?, error = ?, attempts = ?, next_attempt_at = ?, processed_at = ?
+                WHERE id = ?
+                ''', (status, error, attempts, next_attempt_at, datetime.utcnow().isoformat(), handoff_id))
+                conn.commit()
+                conn.close()
+                logger.info(f"Handoff {handoff_id} for {candidate_ref or phone}: {status}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            if len(request_line) < 2:
+                code, body = 400, {"detail": "Malformed request"}
+            else:
+                method, path = request_line[0], request_line[1]
+                length = int(headers.get('content-length', '0'))
+                if length > MAX_BODY_BYTES:
+                    code, body = 413, {"detail": "Request body too large"}
+                else:
+                    payload = await reader.readexactly(length) if length else b''
+                    code, body = self._route(method, path, payload)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            # Malformed request line, headers or truncated body
+            code, body = 400, {"detail": str(e)}
+        except Exception as e:
+            # Our failure, e.g. SQLite while enqueueing or collecting metrics
+            logger.exception("Error handling handoff request")
+            code, body = 500, {"detail": str(e)}
+
+        data = json.dumps(body).encode('utf-8')
+        reason = {
+            200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+            413: 'Payload Too Large', 500: 'Internal Server Error'
+        }
+        writer.write(
+            f"HTTP/1.1 {code} {reason.get(code, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode('latin-1') + data
+        )
+        await writer.drain()
+        writer.close()
+
+    def _route(self, method: str, path: str, payload: bytes):
+        if method == 'POST' and path == '/handoffs':
+            try:
+                handoff = Handoff.from_dict(json.loads(payload or b'null'))
+            except (ValueError, json.JSONDecodeError) as e:
+                return 400, {"detail": str(e)}
+            return 202, {"id": self.enqueue(handoff), "status": "queued"}
+
+        if method == 'GET' and path.startswith('/handoffs/'):
+            handoff_id = path.rsplit('/', 1)[-1]
+            status = self.status(int(handoff_id)) if handoff_id.isdigit() else None
+            if status is None:
+                return 404, {"detail": "Handoff not found"}
+            return 200, status
+
+        if method == 'GET' and path == '/metrics' and self.metrics is not None:
+            return 200, self.metrics()
+
+        return 404, {"detail": "Not found"}
@@ -0,0 +1,84 @@
+# import_benchmark.py
+"""
+Cold-start import benchmark.
+
+Imports each entry point in a fresh interpreter under `python -X importtime`
+and fails if its cumulative import time exceeds the budget, or if it pulls
+in a dependency that must stay lazy.
+
+    python import_benchmark.py
+    IMPORT_BUDGET_SCALE=2 python import_benchmark.py   # slower machines
+"""
+import os
+import re
+import subprocess
+import sys
+
+# Cumulative import budget per entry point, in milliseconds
+BUDGETS_MS = {
+    "api": 1500,
+    "telegram": 1500,
+    "Initial_Candidate_Analysis": 1500,
+    "pages.Response_Analysis": 1500,
+}
+BUDGET_SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+RUNS = int(os.getenv("IMPORT_BENCHMARK_RUNS", "3"))
+# Must only be imported when work is requested (see lazy.py)
+LAZY_MODULES = ("crewai", "PyPDF2", "pandas")
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure(module: str) -> tuple:
+    """
+    Import module in a fresh interpreter.
+
+    Returns:
+        tuple: (cumulative import time in ms, set of top-level packages imported)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    packages = set()
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        packages.add(name.split(".")[0])
+        if len(indent) <= 1:
+            # Top-level import; nested ones are already in its cumulative time
+            total_us += cumulative
+    return total_us / 1000, packages
+
+def main() -> int:
+    failures = []
+    for module, budget in BUDGETS_MS.items():
+        budget *= BUDGET_SCALE
+        # Best of several runs, to keep filesystem cache noise out
+        timings = [measure(module) for _ in range(RUNS)]
+        elapsed = min(ms for ms, _ in timings)
+        eager = sorted(set(LAZY_MODULES) & timings[0][1])
+
+        status = "ok"
+        if elapsed > budget:
+            status = "OVER BUDGET"
+            failures.append(module)
+        if eager:
+            status = f"imports {', '.join(eager)}"
+            failures.append(module)
+        print(f"{module:<28} {elapsed:8.0f} ms  (budget {budget:.0f} ms)  {status}")
+
+    if failures:
+        print(f"Cold start regressed: {', '.join(sorted(set(failures)))}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
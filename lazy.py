@@ -0,0 +1,33 @@
+# lazy.py
+"""
+Accessors for heavy dependencies.
+
+crewai and PyPDF2 take seconds to import and are only needed once work is
+actually requested, so entry points reach them through these functions
+instead of importing them at module top. Python caches the modules after
+the first call, so repeated calls are cheap.
+"""
+import importlib
+
+def crewai():
+    """The crewai package."""
+    return importlib.import_module('crewai')
+
+def crewai_events():
+    """crewai's event bus and event types."""
+    return importlib.import_module('crewai.events')
+
+def job_crew():
+    """
+    The analysis crew definitions, which import crewai themselves.
+
+    Returns:
+        tuple: (JobAgents, JobTasks)
+    """
+    from agents import JobAgents
+    from tasks import JobTasks
+    return JobAgents, JobTasks
+
+def pypdf2():
+    """The PyPDF2 package."""
+    return importlib.import_module('PyPDF2')
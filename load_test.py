@@ -0,0 +1,304 @@
+# load_test.py
+"""
+Load test for the Telegram interview flow.
+
+Registers synthetic candidates with an InterviewClient backed by a fake
+Telethon client and a temporary database, then has each candidate /start
+and answer every question as it arrives. Events go through the real
+dispatcher, handlers, outbox and timers; only the network is fake.
+
+Reports message-handling latency (submit to handler done, including queue
+wait), SQLite statement times and lock waits, event-loop lag, outbox
+throughput and memory per active interview.
+
+    python load_test.py
+    python load_test.py --candidates 5000 --pattern burst --send-rate 200
+    python load_test.py --contention 5 --json results.json
+
+Answer patterns:
+    steady   think time with +/-50% jitter
+    poisson  exponentially distributed think times
+    burst    everyone answers question N at the same moment
+
+The outbox sends at most --send-rate messages per second (the production
+limit by default), which bounds the whole flow; raise it to load the
+handlers harder. --contention runs a VACUUM every N seconds from another
+connection, as the dashboard's cleanup does.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from types import SimpleNamespace
+from telethon import errors
+import telegram
+from monitoring import LOCK_WAIT_THRESHOLD, LoopLagSampler, latency_summary, statement_stats
+from outbox import GLOBAL_RATE, TokenBucket
+from telegram import InterviewClient
+
+LAG_INTERVAL = 0.05
+ANSWER = "In my last role I handled this by talking to the people involved, agreeing on a plan and following up weekly."
+
+class FakeTelegramClient:
+    """The Telethon client surface InterviewClient uses, without a network"""
+
+    def __init__(self, send_latency: float, flood_rate: float, flood_seconds: int, rng: random.Random):
+        self.send_latency = send_latency
+        self.flood_rate = flood_rate
+        self.flood_seconds = flood_seconds
+        self.rng = rng
+        self.inboxes = defaultdict(asyncio.Queue)
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def get_entity(self, phone_number: str):
+        return SimpleNamespace(id=int(phone_number.lstrip("+")), access_hash=self.rng.getrandbits(63))
+
+    async def send_message(self, peer, text: str):
+        await asyncio.sleep(self.rng.expovariate(1 / self.send_latency) if self.send_latency else 0)
+        if self.rng.random() < self.flood_rate:
+            raise errors.FloodWaitError(request=None, capture=self.flood_seconds)
+        self.inboxes[getattr(peer, "user_id", peer)].put_nowait(text)
+
+class FakeEvent:
+    """The parts of a Telethon NewMessage event the handlers read"""
+
+    def __init__(self, user_id: int, text: str):
+        self.sender_id = self.chat_id = user_id
+        self.is_private = True
+        self.message = SimpleNamespace(text=text)
+        self.submitted_at = time.monotonic()
+
+class LoadTest:
+    def __init__(self, args, db_path: str):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.fake = FakeTelegramClient(args.send_latency, args.flood_rate, args.flood_seconds, self.rng)
+        self.client = InterviewClient(None, None, db_path=db_path, client=self.fake)
+        self.client.outbox.global_bucket = TokenBucket(args.send_rate, max(1, int(args.send_rate)))
+        self.latencies = []
+        # Keeps every lag sample for the percentiles, not just a recent window
+        self.lag = LoopLagSampler(LAG_INTERVAL, window=None)
+        self.completed = 0
+        self.stalled = 0
+        self.peak_active = 0
+        self.peak_memory = 0
+
+        handle = self.client.dispatcher.handler
+
+        async def timed_handler(event):
+            try:
+                await handle(event)
+            finally:
+                if isinstance(event, FakeEvent):
+                    self.latencies.append(time.monotonic() - event.submitted_at)
+
+        self.client.dispatcher.handler = timed_handler
+
+    def think_time(self) -> float:
+        think = self.args.think_time
+        if self.args.pattern == "poisson":
+            return self.rng.expovariate(1 / think)
+        if self.args.pattern == "steady":
+            return think * self.rng.uniform(0.5, 1.5)
+        return think
+
+    async def sample(self):
+        """Active interviews and memory at their peak."""
+        while True:
+            await asyncio.sleep(LAG_INTERVAL)
+            active = len(self.client.active_interviews)
+            if active > self.peak_active:
+                self.peak_active = active
+                if tracemalloc.is_tracing():
+                    self.peak_memory = tracemalloc.get_traced_memory()[0]
+
+    async def next_message(self, user_id: int, prefix: str) -> bool:
+        """Wait for the next message starting with prefix; False on timeout."""
+        inbox = self.fake.inboxes[user_id]
+        deadline = time.monotonic() + self.args.timeout
+        while True:
+            try:
+                text = await asyncio.wait_for(inbox.get(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                return False
+            if text.startswith(prefix):
+                return True
+
+    async def candidate(self, user_id: int, started_at: float):
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp))
+        await self.client.dispatcher.submit(user_id, FakeEvent(user_id, "/start"))
+        for index in range(self.args.questions):
+            if not await self.next_message(user_id, "📝"):
+                self.stalled += 1
+                return
+            if self.args.pattern == "burst":
+                # Rounds are aligned to the run's start, not to this candidate
+                round_at = started_at + self.args.ramp + (index + 1) * self.args.think_time
+                await asyncio.sleep(max(0.0, round_at - time.monotonic()))
+            else:
+                await asyncio.sleep(self.think_time())
+            await self.client.dispatcher.submit(user_id, FakeEvent(user_id, ANSWER))
+        if await self.next_message(user_id, "🎉"):
+            self.completed += 1
+        else:
+            self.stalled += 1
+
+    async def run(self) -> dict:
+        args = self.args
+        questions = [f"Synthetic question {i + 1}?" for i in range(args.questions)]
+        user_ids = [10_000_000 + i for i in range(args.candidates)]
+        # Started first: messages queued before outbox.start() would be loaded twice
+        self.client.outbox.start()
+        await self.client.dispatcher.start()
+        self.client.timers.start()
+        for user_id in user_ids:
+            await self.client.add_candidate(f"+{user_id}", questions)
+
+        self.lag.start()
+        sampler = asyncio.create_task(self.sample())
+        memory_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        started_at = time.monotonic()
+        await asyncio.gather(*(self.candidate(user_id, started_at) for user_id in user_ids))
+        elapsed = time.monotonic() - started_at
+
+        sampler.cancel()
+        await asyncio.gather(sampler, return_exceptions=True)
+        await self.lag.stop()
+        await self.client.timers.stop()
+        await self.client.dispatcher.stop()
+        await self.client.outbox.stop()
+
+        if tracemalloc.is_tracing():
+            memory = (self.peak_memory - memory_before) / max(1, self.peak_active)
+            memory_source = "tracemalloc"
+        else:
+            # ru_maxrss is in KB on Linux; coarse, includes everything the run allocated
+            memory = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024 / max(1, self.peak_active)
+            memory_source = "peak rss"
+        return {
+            "config": vars(args),
+            "elapsed_seconds": elapsed,
+            "completed": self.completed,
+            "stalled": self.stalled,
+            "messages_per_second": len(self.latencies) / elapsed if elapsed else 0.0,
+            "handling_latency": {"count": len(self.latencies), **latency_summary(self.latencies)},
+            "dispatcher": self.client.dispatcher.metrics(),
+            "sqlite": statement_stats.metrics(),
+            "event_loop_lag": self.lag.metrics(),
+            "outbox": self.client.outbox.metrics(),
+            "peak_active_interviews": self.peak_active,
+            "bytes_per_active_interview": memory,
+            "memory_source": memory_source
+        }
+
+def vacuum_periodically(db_path: str, every: float, stop: threading.Event):
+    """Contend for the database like the dashboard's cleanup VACUUM."""
+    while not stop.wait(every):
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("VACUUM")
+        except sqlite3.OperationalError as e:
+            logging.getLogger(__name__).warning(f"Contention VACUUM failed: {e}")
+        finally:
+            conn.close()
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms" if seconds is not None else "-"
+
+def print_report(result: dict):
+    config = result["config"]
+    latency = result["handling_latency"]
+    lag = result["event_loop_lag"]
+    sqlite_stats = result["sqlite"]
+    outbox = result["outbox"]
+    print(f"{config['candidates']} candidates x {config['questions']} questions, "
+          f"pattern {config['pattern']}, think {config['think_time']}s, send rate {config['send_rate']}/s")
+    print(f"completed {result['completed']}, stalled {result['stalled']} in {result['elapsed_seconds']:.1f}s; "
+          f"{latency['count']} messages handled ({result['messages_per_second']:.1f}/s), "
+          f"{result['dispatcher']['failed']} failed")
+    print(f"handling latency   p50 {ms(latency['p50'])}  p95 {ms(latency['p95'])}  "
+          f"p99 {ms(latency['p99'])}  max {ms(latency['max'])}")
+    print(f"event-loop lag     p50 {ms(lag['p50'])}  p95 {ms(lag['p95'])}  p99 {ms(lag['p99'])}  max {ms(lag['max'])}  "
+          f"({lag['stalls']} stalls)")
+    for kind, times in sorted(sqlite_stats["by_kind"].items()):
+        print(f"sqlite {kind:<11} p50 {ms(times['p50'])}  p95 {ms(times['p95'])}  "
+              f"p99 {ms(times['p99'])}  max {ms(times['max'])}  ({times['count']} statements)")
+    print(f"sqlite lock waits  {sqlite_stats['lock_waits']} over {ms(LOCK_WAIT_THRESHOLD)} "
+          f"({sqlite_stats['lock_wait_seconds']:.2f}s total), {sqlite_stats['busy_errors']} SQLITE_BUSY errors")
+    print(f"outbox             {outbox['sent']} sent, {outbox['failed']} failed, {outbox['flood_waits']} flood waits "
+          f"({outbox['flood_wait_seconds']}s), avg send {ms(outbox['avg_send_seconds'])}")
+    print(f"memory             {result['bytes_per_active_interview'] / 1024:.1f} KB per active interview "
+          f"({result['memory_source']}, peak {result['peak_active_interviews']} active)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--pattern", choices=("steady", "poisson", "burst"), default="steady")
+    parser.add_argument("--think-time", type=float, default=2.0, help="Mean seconds before each answer")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which candidates /start")
+    parser.add_argument("--send-rate", type=float, default=GLOBAL_RATE, help="Outbox messages per second")
+    parser.add_argument("--send-latency", type=float, default=0.02, help="Mean seconds per fake send")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="Fraction of sends answered with a flood wait")
+    parser.add_argument("--flood-seconds", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=telegram.HANDLER_WORKERS, help="Dispatcher workers")
+    parser.add_argument("--contention", type=float, default=0.0, help="VACUUM every N seconds; 0 disables")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds a candidate waits for a message")
+    parser.add_argument("--trace-memory", action="store_true", help="Measure memory with tracemalloc (slows the run)")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep-db", action="store_true", help="Keep the temporary database")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    # Synthetic answers are never thin, but never call a model either way
+    telegram.ADAPTIVE_FOLLOWUPS = False
+    telegram.HANDLER_WORKERS = args.workers
+    # Keep every statement timing for the percentiles, not just a recent window
+    statement_stats.window = None
+    statement_stats.enabled = True
+    if args.trace_memory:
+        tracemalloc.start()
+
+    directory = tempfile.mkdtemp(prefix="interview-load-")
+    db_path = os.path.join(directory, "interviews.db")
+    stop = threading.Event()
+    try:
+        async def run():
+            test = LoadTest(args, db_path)
+            if args.contention:
+                threading.Thread(
+                    target=vacuum_periodically, args=(db_path, args.contention, stop), daemon=True
+                ).start()
+            return await test.run()
+
+        result = asyncio.run(run())
+    finally:
+        stop.set()
+        if args.keep_db:
+            print(f"Database kept at {db_path}", file=sys.stderr)
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# monitoring.py
+"""
+Runtime instrumentation for the interview bot.
+
+LoopLagSampler measures how late the event loop wakes a sleeping task,
+which is how long something (a synchronous SQLite call, a slow handler)
+held the loop. statement_stats times SQLite statements on connections
+opened by db.connect() once enabled, and counts lock waits and
+SQLITE_BUSY errors, so a slow bot can be attributed to the loop, the
+database or the network.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this most likely waited for another connection's lock
+LOCK_WAIT_THRESHOLD = float(os.getenv("SQLITE_LOCK_WAIT_MS", "5")) / 1000
+# Loop lag worth a warning of its own
+STALL_THRESHOLD = float(os.getenv("LOOP_STALL_MS", "250")) / 1000
+SAMPLE_WINDOW = 1000
+SQLITE_BUSY_CODES = (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+def percentile(samples: list, fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def latency_summary(samples) -> dict:
+    samples = list(samples)
+    return {
+        "p50": percentile(samples, 0.5),
+        "p95": percentile(samples, 0.95),
+        "p99": percentile(samples, 0.99),
+        "max": max(samples, default=None)
+    }
+
+def is_busy(error: sqlite3.OperationalError) -> bool:
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code in SQLITE_BUSY_CODES
+    return "locked" in str(error) or "busy" in str(error)
+
+class LoopLagSampler:
+    """Samples event-loop lag: how much later than requested a sleep returns."""
+
+    def __init__(self, interval: float = 0.1, window: int = SAMPLE_WINDOW):
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self.stalls = 0
+        self.worst = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run(), name="loop-lag")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - started - self.interval
+            self.samples.append(lag)
+            self.worst = max(self.worst, lag)
+            if lag > STALL_THRESHOLD:
+                self.stalls += 1
+                logger.warning(f"Event loop stalled for {lag * 1000:.0f}ms")
+
+    def metrics(self) -> dict:
+        return {**latency_summary(self.samples), "stalls": self.stalls, "worst": self.worst}
+
+class StatementStats:
+    """
+    Timings of SQLite statements, by statement kind (SELECT, INSERT, ...).
+
+    Off until enabled; db.connect() only hands out timed connections then.
+    Connections are used from the loop and from worker threads, hence the lock.
+    """
+
+    def __init__(self, window: int = SAMPLE_WINDOW):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.total_seconds = 0.0
+        self.lock_waits = 0
+        self.lock_wait_seconds = 0.0
+        self.busy_errors = 0
+        self.slowest = (0.0, None)
+
+    def timed(self, sql: str, run):
+        started = time.monotonic()
+        try:
+            return run()
+        except sqlite3.OperationalError as e:
+            if is_busy(e):
+                with self.lock:
+                    self.busy_errors += 1
+            raise
+        finally:
+            self.record(sql, time.monotonic() - started)
+
+    def record(self, sql: str, seconds: float):
+        kind = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "OTHER"
+        with self.lock:
+            if kind not in self.samples:
+                self.samples[kind] = deque(maxlen=self.window)
+                self.counts[kind] = 0
+            self.samples[kind].append(seconds)
+            self.counts[kind] += 1
+            self.total_seconds += seconds
+            if seconds > LOCK_WAIT_THRESHOLD:
+                self.lock_waits += 1
+                self.lock_wait_seconds += seconds
+            if seconds > self.slowest[0]:
+                self.slowest = (seconds, " ".join(sql.split())[:120])
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {
+                "statements": sum(self.counts.values()),
+                "seconds": self.total_seconds,
+                "lock_waits": self.lock_waits,
+                "lock_wait_seconds": self.lock_wait_seconds,
+                "busy_errors": self.busy_errors,
+                "slowest": {"seconds": self.slowest[0], "sql": self.slowest[1]},
+                "by_kind": {
+                    kind: {"count": self.counts[kind], **latency_summary(samples)}
+                    for kind, samples in self.samples.items()
+                }
+            }
+
+statement_stats = StatementStats()
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        return statement_stats.timed(sql, lambda: super(TimedCursor, self).execute(sql, parameters))
+
+    def executemany(self, sql, seq_of_parameters):
+        return statement_stats.timed(sql, lambda: super(TimedCursor, self).executemany(sql, seq_of_parameters))
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection factory that records into statement_stats"""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        # A commit waits here for readers to let go of the database
+        statement_stats.timed("COMMIT", super().commit)
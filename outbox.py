@@ -0,0 +1,287 @@
+# outbox.py
+import asyncio
+import heapq
+import logging
+import random
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+from telethon import errors
+from db import connect, DB_PATH
+from monitoring import SAMPLE_WINDOW, latency_summary
+
+logger = logging.getLogger(__name__)
+
+# Messages per second across all chats, and burst size
+GLOBAL_RATE = 20.0
+GLOBAL_BURST = 20
+# Messages per second to one chat, and burst size
+CHAT_RATE = 1.0
+CHAT_BURST = 3
+MAX_IN_FLIGHT = 8
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 2.0
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+class OutboundMessage(NamedTuple):
+    id: int
+    intent_key: str
+    chat_id: str
+    text: str
+
+class Outbox:
+    """
+    Central outbound queue for Telegram messages.
+
+    Messages are persisted before sending and delivered in order per chat,
+    limited by a global and a per-chat token bucket. A FloodWaitError pauses
+    all sending for the requested time and retries the same message. Each
+    message has an intent key, and enqueueing an intent that is already
+    known is a no-op, so retried callers cannot send duplicates.
+    """
+
+    def __init__(self, client, resolve_peer: Callable[[str], object], db_path: str = DB_PATH,
+                 global_rate: float = GLOBAL_RATE, global_burst: int = GLOBAL_BURST,
+                 chat_rate: float = CHAT_RATE, chat_burst: int = CHAT_BURST,
+                 max_in_flight: int = MAX_IN_FLIGHT):
+        self.client = client
+        self.resolve_peer = resolve_peer
+        self.db_path = db_path
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.chat_buckets = {}
+        self.queues = {}
+        self.attempts = {}
+        self.schedule = []
+        self.scheduled = set()
+        self.seq = 0
+        self.paused_until = 0.0
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.deliveries = set()
+        self.sent = 0
+        self.failed = 0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0
+        self.send_seconds = 0.0
+        self.send_latencies = deque(maxlen=SAMPLE_WINDOW)
+
+    def start(self):
+        """Load undelivered messages and start the sender loop."""
+        if self.task is not None:
+            return
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, intent_key, chat_id, text, attempts FROM outbox WHERE status = 'pending' ORDER BY id"
+        )
+        rows = cursor.fetchall()
+        conn.close()
+        for row in rows:
+            self._queue(OutboundMessage(*row[:4]), row[4])
+        if rows:
+            logger.info(f"Outbox resumed {len(rows)} pending messages")
+        self.task = asyncio.create_task(self._run(), name="outbox")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def drain(self, timeout: float = 60.0):
+        """Wait until queued messages are delivered or given up on."""
+        deadline = time.monotonic() + timeout
+        while self.queues and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+    def send(self, chat_id: str, text: str, intent: Optional[str] = None) -> bool:
+        """
+        Persist and queue a message.
+
+        Args:
+            chat_id (str): Recipient user id
+            text (str): Message text
+            intent (str): Idempotency key; defaults to a unique key
+
+        Returns:
+            bool: False if a message with this intent was already queued or sent
+        """
+        intent_key = intent or f"adhoc:{uuid.uuid4().hex}"
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT OR IGNORE INTO outbox (intent_key, chat_id, text, status, attempts, created_at)
+        VALUES (?, ?, ?, 'pending', 0, ?)
+        ''', (intent_key, str(chat_id), text, datetime.utcnow().isoformat()))
+        conn.commit()
+        message_id = cursor.lastrowid if cursor.rowcount else None
+        conn.close()
+
+        if message_id is None:
+            logger.info(f"Skipping duplicate outbound message {intent_key}")
+            return False
+        self._queue(OutboundMessage(message_id, intent_key, str(chat_id), text))
+        return True
+
+    def _queue(self, message: OutboundMessage, attempts: int = 0):
+        self.queues.setdefault(message.chat_id, deque()).append(message)
+        self.attempts[message.id] = attempts
+        if message.chat_id not in self.scheduled:
+            self._schedule(message.chat_id, time.monotonic())
+
+    def _schedule(self, chat_id: str, ready_at: float):
+        self.scheduled.add(chat_id)
+        self.seq += 1
+        heapq.heappush(self.schedule, (ready_at, self.seq, chat_id))
+        self.wakeup.set()
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def _sleep_until(self, deadline: float):
+        """Sleep until deadline or until new work is scheduled."""
+        self.wakeup.clear()
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        while True:
+            if not self.schedule:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            ready_at, _, chat_id = self.schedule[0]
+            now = time.monotonic()
+            start_at = max(ready_at, self.paused_until, now + self.global_bucket.delay(now))
+            if start_at > now:
+                await self._sleep_until(start_at)
+                continue
+
+            heapq.heappop(self.schedule)
+            bucket = self._chat_bucket(chat_id)
+            chat_delay = bucket.delay(now)
+            if chat_delay > 0:
+                # Chat stays scheduled, just later
+                self.seq += 1
+                heapq.heappush(self.schedule, (now + chat_delay, self.seq, chat_id))
+                continue
+
+            await self.in_flight.acquire()
+            self.global_bucket.take(time.monotonic())
+            bucket.take(time.monotonic())
+            delivery = asyncio.create_task(self._deliver(chat_id))
+            self.deliveries.add(delivery)
+            delivery.add_done_callback(self.deliveries.discard)
+
+    async def _deliver(self, chat_id: str):
+        queue = self.queues[chat_id]
+        message = queue[0]
+        retry_at = None
+        started = time.monotonic()
+        try:
+            await self.client.send_message(self.resolve_peer(chat_id), message.text)
+        except errors.FloodWaitError as e:
+            # Telegram asks for a pause: hold all sending, keep the message
+            self.flood_waits += 1
+            self.flood_wait_seconds += e.seconds
+            self.paused_until = max(self.paused_until, time.monotonic() + e.seconds)
+            logger.warning(f"Flood wait of {e.seconds}s while sending {message.intent_key}")
+            retry_at = self.paused_until
+        except Exception as e:
+            attempts = self.attempts[message.id] + 1
+            self.attempts[message.id] = attempts
+            if attempts >= MAX_ATTEMPTS:
+                logger.error(f"Giving up on {message.intent_key} after {attempts} attempts: {e}")
+                self._mark(message, 'failed', attempts, str(e))
+                self.failed += 1
+                queue.popleft()
+            else:
+                logger.warning(f"Send of {message.intent_key} failed (attempt {attempts}): {e}")
+                self._mark(message, 'pending', attempts, str(e))
+                backoff = RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+                retry_at = time.monotonic() + backoff * random.uniform(0.5, 1.5)
+        else:
+            elapsed = time.monotonic() - started
+            self.send_seconds += elapsed
+            self.send_latencies.append(elapsed)
+            self.sent += 1
+            self._mark(message, 'sent', self.attempts[message.id] + 1, None)
+            queue.popleft()
+        finally:
+            self.in_flight.release()
+
+        if retry_at is None and not queue:
+            # Chat drained; forget it
+            del self.queues[chat_id]
+            self.attempts.pop(message.id, None)
+            self.scheduled.discard(chat_id)
+            if self._chat_bucket(chat_id).full(time.monotonic()):
+                del self.chat_buckets[chat_id]
+            self.wakeup.set()
+            return
+        if retry_at is None:
+            self.attempts.pop(message.id, None)
+        self._schedule(chat_id, retry_at or time.monotonic())
+
+    def _mark(self, message: OutboundMessage, status: str, attempts: int, error: Optional[str]):
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        UPDATE outbox SET status = ?, attempts = ?, last_error = ?, sent_at = ?
+        WHERE id = ?
+        ''', (
+            status,
+            attempts,
+            error,
+            datetime.utcnow().isoformat() if status == 'sent' else None,
+            message.id
+        ))
+        conn.commit()
+        conn.close()
+
+    def metrics(self) -> dict:
+        return {
+            "queued": sum(len(queue) for queue in self.queues.values()),
+            "queued_chats": len(self.queues),
+            "sent": self.sent,
+            "failed": self.failed,
+            "flood_waits": self.flood_waits,
+            "flood_wait_seconds": self.flood_wait_seconds,
+            "avg_send_seconds": self.send_seconds / self.sent if self.sent else 0.0,
+            "send_latency": latency_summary(self.send_latencies),
+            "paused_for": max(0.0, self.paused_until - time.monotonic())
+        }
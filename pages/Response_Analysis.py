@@ -1,28 +1,48 @@
 import streamlit as st
 import sqlite3
-from crewai import Agent, Task, Crew, Process
 import json
-from typing import List, Dict
-import pandas as pd
+import os
+import hashlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, TYPE_CHECKING
+import logging
+from db import connect
+from lazy import crewai
+from routing import build_llm, escalate, route
+from assets import assets
+from blobs import BlobStore
+from schemas import ResponseAssessment, validator
+from transcript import chunk_qa_pairs, encode_transcript, token_report
 
-with open('jd.txt', 'r') as f:
-    job_description = f.read()
+if TYPE_CHECKING:
+    from crewai import Task
+
+# Chat histories above this estimated size are analyzed in chunks
+CHUNK_TOKEN_BUDGET = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "3000"))
+MAX_CHUNK_WORKERS = int(os.getenv("ANALYSIS_CHUNK_WORKERS", "4"))
+SCORE_FIELDS = ("clarity", "completeness", "relevance")
+PAGE_SIZE = 50
+ALL_CANDIDATES = "All candidates"
+
+logger = logging.getLogger(__name__)
 
 class ResponseAnalysisAgent:
-    def __init__(self):
-        self.analyst = Agent(
+    def __init__(self, tier: str = "strong"):
+        self.analyst = crewai().Agent(
             role="Interview Response Analyst",
             goal="Analyze candidate responses to assess communication skills, clarity, and response quality",
             backstory="""You are an expert in analyzing interview responses and communication patterns. 
             You excel at identifying key themes, assessing response quality, and providing actionable insights 
             from candidate answers. Your analysis helps determine candidate suitability and areas for further discussion.""",
+            llm=build_llm(tier),
             verbose=True
         )
 
 class ResponseAnalysisTasks:
     @staticmethod
-    def analyze_responses(agent, chat_history: str) -> Task:
-        return Task(
+    def analyze_responses(agent, chat_history: str, job_description: str) -> "Task":
+        return crewai().Task(
             description=f"""by analyze the following Job follow up Q and A responses with given JD, provide a detailed assessment.
             
             Job Description : {job_description}
@@ -52,35 +72,120 @@ class ResponseAnalysisTasks:
             agent=agent
         )
 
-def get_chat_history(db_path: str = 'interviews.db') -> List[Dict]:
+    @staticmethod
+    def reduce_analyses(agent, chunk_analyses: str) -> "Task":
+        return crewai().Task(
+            description=f"""The following are analyses of consecutive parts of one candidate's Job follow up Q and A.
+            Merge them into a single assessment of the whole interview.
+            
+            Partial Analyses: {chunk_analyses}
+            
+            Provide your merged analysis in the following JSON format:
+            {{
+                "key_strengths": [<list of 2-3 communication strengths>],
+                "areas_of_improvement": [<list of 1-2 areas to improve>],
+                "themes_identified": [<list of 2-3 recurring themes>],
+                "recommendations_for_hiring_manager": [<conclutions for hiring manager with special note if needed>]
+            }}
+            
+            Prefer themes that recur across parts and drop duplicates.""",
+            expected_output="A JSON string containing the merged strengths, themes and recommendations",
+            agent=agent
+        )
+
+def get_data_version(db_path: str = 'interviews.db') -> tuple:
+    """
+    Cheap change marker for the interview data.
+
+    New answers raise MAX(id); archival removes candidates from questions.
+    """
+    conn = connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT (SELECT MAX(id) FROM chat_history),
+               (SELECT COUNT(*) FROM questions)
+        ''')
+        return cursor.fetchone()
+    finally:
+        conn.close()
+
+def query_records(db_path: str, query: str, params: tuple = ()) -> List[Dict]:
     conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
     try:
-        # Read chat history into a pandas DataFrame
-        query = "SELECT * FROM chat_history ORDER BY timestamp"
-        df = pd.read_sql_query(query, conn)
-        return df.to_dict('records')
+        return [dict(row) for row in conn.execute(query, params)]
     finally:
         conn.close()
 
-def analyze_responses(chat_history: List[Dict]) -> dict:
-    # Initialize agent and task
-    agent = ResponseAnalysisAgent().analyst
-    tasks = ResponseAnalysisTasks()
-    
-    # Format chat history for analysis
-    formatted_history = json.dumps(chat_history, indent=2)
-    
-    # Create crew with single task
-    analysis_crew = Crew(
-        agents=[agent],
-        tasks=[tasks.analyze_responses(agent, formatted_history)],
-        process=Process.sequential,
-        verbose=True
+@st.cache_data(max_entries=32)
+def get_chat_history(db_path: str = 'interviews.db', candidate_id: str = None, data_version: tuple = None) -> List[Dict]:
+    """Full chat history, optionally for one candidate. data_version only keys the cache."""
+    if candidate_id:
+        return query_records(
+            db_path,
+            "SELECT * FROM chat_history WHERE candidate_id = ? ORDER BY id",
+            (candidate_id,)
+        )
+    return query_records(db_path, "SELECT * FROM chat_history ORDER BY id")
+
+@st.cache_data(max_entries=256)
+def get_chat_history_page(db_path: str, candidate_id: str, after_id: int, data_version: tuple) -> List[Dict]:
+    """One page of chat history after a given id (keyset pagination)."""
+    if candidate_id:
+        return query_records(
+            db_path,
+            "SELECT * FROM chat_history WHERE candidate_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (candidate_id, after_id, PAGE_SIZE)
+        )
+    return query_records(
+        db_path,
+        "SELECT * FROM chat_history WHERE id > ? ORDER BY id LIMIT ?",
+        (after_id, PAGE_SIZE)
     )
-    
-    # Run analysis
-    result = analysis_crew.kickoff()
-    
+
+@st.cache_data(max_entries=256)
+def get_candidate_role(db_path: str, candidate_id: str, data_version: tuple) -> tuple:
+    """
+    The JD a candidate was screened against and their role name, which
+    selects per-role assets.
+
+    Returns:
+        tuple: (jd_id, role), either of which may be None
+    """
+    if not candidate_id:
+        return None, None
+    rows = query_records(db_path, "SELECT jd_id, role FROM questions WHERE candidate_id = ?", (candidate_id,))
+    return (rows[0]["jd_id"], rows[0]["role"]) if rows else (None, None)
+
+@st.cache_resource
+def get_blob_store(db_path: str) -> BlobStore:
+    """CV and JD texts stored by the API, shared across reruns and sessions"""
+    return BlobStore(db_path)
+
+def load_job_description(db_path: str, jd_id: str, role: str = None) -> str:
+    """
+    The JD a candidate was screened against, from the blob store. Candidates
+    registered without a jd_id use their role's current JD, and otherwise
+    the jd.txt asset (the role's own, if it has one).
+    """
+    if jd_id is None and role:
+        rows = query_records(db_path, "SELECT jd_id FROM roles WHERE name = ?", (role,))
+        jd_id = rows[0]["jd_id"] if rows else None
+    if jd_id is None:
+        return assets.job_description(role)
+    try:
+        return get_blob_store(db_path).get(jd_id)
+    except KeyError:
+        logger.error(f"Job description {jd_id} is not in the blob store")
+        return None
+
+@st.cache_data(max_entries=8)
+def get_candidate_ids(db_path: str, data_version: tuple) -> List[str]:
+    rows = query_records(db_path, "SELECT DISTINCT candidate_id FROM chat_history ORDER BY candidate_id")
+    return [row["candidate_id"] for row in rows]
+
+def parse_analysis(result) -> dict:
     try:
         # Clean up potential markdown formatting
         cleaned_result = str(result).replace("```json", "").replace("```", "").strip()
@@ -90,7 +195,215 @@ def analyze_responses(chat_history: List[Dict]) -> dict:
             "error": "Failed to parse analysis result",
             "raw_content": str(result)
         }
+
+def validate_analysis(model: type, result: dict) -> dict:
+    """
+    Coerce a parsed result to model (a score of "7" becomes 7.0), or turn
+    it into an error result if it does not fit.
+    """
+    if "error" in result:
+        return result
+    try:
+        return validator(model).validate_python(result).model_dump()
+    except ValueError as e:
+        return {
+            "error": f"Analysis result does not match the expected format: {e}",
+            "raw_content": json.dumps(result)
+        }
+
+def run_analysis_crew(agent_route: str, task_factory, *args, model: type = None) -> dict:
+    """
+    Run a single-task crew with a fresh analyst on the route's model and
+    parse its output (validated against model when given), escalating one
+    model tier up if it does not parse.
+    """
+    tier = route(agent_route)
+    while True:
+        agent = ResponseAnalysisAgent(tier).analyst
+        analysis_crew = crewai().Crew(
+            agents=[agent],
+            tasks=[task_factory(agent, *args)],
+            process=crewai().Process.sequential,
+            verbose=True
+        )
+        result = parse_analysis(analysis_crew.kickoff())
+        if model is not None:
+            result = validate_analysis(model, result)
+        if "error" not in result or escalate(tier) is None:
+            return result
+        logger.warning(f"{agent_route} output on the {tier} model did not parse; escalating")
+        tier = escalate(tier)
+
+def init_checkpoints(db_path: str):
+    """Create the table holding per-chunk analysis results"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analysis_checkpoints (
+        checkpoint_key TEXT PRIMARY KEY,
+        result TEXT,
+        created_at TIMESTAMP
+    )
+    ''')
+    conn.commit()
+    conn.close()
+
+def checkpoint_key(*parts: str) -> str:
+    """Content hash identifying a chunk or reduce step across runs."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def load_checkpoint(db_path: str, key: str):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('SELECT result FROM analysis_checkpoints WHERE checkpoint_key = ?', (key,))
+    row = cursor.fetchone()
+    conn.close()
+    return json.loads(row[0]) if row else None
+
+def save_checkpoint(db_path: str, key: str, result: dict):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(
+        'INSERT OR REPLACE INTO analysis_checkpoints (checkpoint_key, result, created_at) VALUES (?, ?, ?)',
+        (key, json.dumps(result), datetime.utcnow().isoformat())
+    )
+    conn.commit()
+    conn.close()
+
+def checkpointed(db_path: str, key: str, agent_route: str, task_factory, *args, model: type = None) -> dict:
+    """Return a stored result for key, or run the crew and store a successful result."""
+    result = load_checkpoint(db_path, key)
+    if result is not None and model is not None:
+        # Checkpoints written before results were validated may not fit
+        result = validate_analysis(model, result)
+        if "error" in result:
+            result = None
+    if result is None:
+        result = run_analysis_crew(agent_route, task_factory, *args, model=model)
+        if "error" not in result:
+            save_checkpoint(db_path, key, result)
+    return result
+
+def merge_chunk_scores(chunk_results: List[Dict], chunk_sizes: List[int]) -> dict:
+    """Weighted average of chunk scores by number of Q&A pairs; results must be validated."""
+    total = sum(chunk_sizes)
+    merged = {"overall_score": 0, "response_quality": {field: 0 for field in SCORE_FIELDS}}
+    for result, size in zip(chunk_results, chunk_sizes):
+        weight = size / total
+        merged["overall_score"] += result["overall_score"] * weight
+        for field in SCORE_FIELDS:
+            merged["response_quality"][field] += result["response_quality"][field] * weight
+    merged["overall_score"] = round(merged["overall_score"])
+    for field in SCORE_FIELDS:
+        merged["response_quality"][field] = round(merged["response_quality"][field])
+    return merged
+
+def analyze_responses_chunked(chat_history: List[Dict], job_description: str,
+                              db_path: str = 'interviews.db', role: str = None) -> dict:
+    """
+    Map-reduce analysis for long chat histories.
+
+    Q&A pairs are chunked by token budget and analyzed concurrently, then a
+    small reduce step merges themes while scores are averaged by chunk size.
+    Every successful step is checkpointed, so a failed run resumes from the
+    chunks that already completed.
+    """
+    init_checkpoints(db_path)
+    question_starters = assets.question_starters(role)
+    chunks = chunk_qa_pairs(chat_history, CHUNK_TOKEN_BUDGET)
+    tasks = ResponseAnalysisTasks()
+
+    def analyze_chunk(numbered_chunk):
+        start, chunk = numbered_chunk
+        formatted = encode_transcript(chunk, start, question_starters)
+        key = checkpoint_key("chunk", job_description, formatted)
+        return checkpointed(
+            db_path, key, "response_chunk", tasks.analyze_responses, formatted, job_description,
+            model=ResponseAssessment
+        )
+
+    with ThreadPoolExecutor(max_workers=MAX_CHUNK_WORKERS) as executor:
+        chunk_results = list(executor.map(analyze_chunk, chunks))
+
+    failed = [result for result in chunk_results if "error" in result]
+    if failed:
+        return failed[0]
+
+    # Reduce themes and recommendations with a short prompt over chunk results
+    reduce_input = json.dumps([
+        {field: result.get(field, []) for field in (
+            "key_strengths", "areas_of_improvement",
+            "themes_identified", "recommendations_for_hiring_manager"
+        )}
+        for result in chunk_results
+    ])
+    merged = checkpointed(
+        db_path,
+        checkpoint_key("reduce", reduce_input),
+        "response_final",
+        tasks.reduce_analyses,
+        reduce_input
+    )
+    if "error" in merged:
+        return merged
+
+    merged.update(merge_chunk_scores(chunk_results, [len(chunk) for _, chunk in chunks]))
+    return merged
+
+def analyze_responses(chat_history: List[Dict], db_path: str = 'interviews.db',
+                      jd_id: str = None, role: str = None) -> dict:
+    job_description = load_job_description(db_path, jd_id, role)
+    if job_description is None:
+        if jd_id is None:
+            return {"error": "Job description (jd.txt) is missing or empty"}
+        return {"error": f"Job description {jd_id} is not stored; re-screen the candidate"}
+
+    # Format chat history as a compact numbered transcript
+    formatted_history = encode_transcript(chat_history, starters=assets.question_starters(role))
+    report = token_report(chat_history, formatted_history)
+    logger.info(
+        f"Transcript: {report['pairs']} pairs, {report['transcript_tokens']} tokens "
+        f"(indented JSON would be {report['json_tokens']})"
+    )
+
+    # Long interviews are analyzed in resumable chunks
+    if report['transcript_tokens'] > CHUNK_TOKEN_BUDGET:
+        return analyze_responses_chunked(chat_history, job_description, db_path, role)
+
+    return run_analysis_crew(
+        "response_final", ResponseAnalysisTasks().analyze_responses, formatted_history, job_description,
+        model=ResponseAssessment
+    )
     
+def save_response_scores(db_path: str, candidate_id: str, jd_id: str, chat_history: List[Dict], result: dict):
+    """Append an analysis's scores to response_scores for reporting."""
+    quality = result.get("response_quality", {})
+    conn = connect(db_path)
+    conn.execute('''
+    INSERT INTO response_scores
+        (candidate_id, jd_id, first_chat_id, last_chat_id, answers, overall_score,
+         clarity, completeness, relevance, result, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        candidate_id,
+        jd_id,
+        chat_history[0]["id"],
+        chat_history[-1]["id"],
+        len(chat_history),
+        result.get("overall_score"),
+        quality.get("clarity"),
+        quality.get("completeness"),
+        quality.get("relevance"),
+        json.dumps(result),
+        datetime.utcnow().isoformat()
+    ))
+    conn.commit()
+    conn.close()
+
 def cleanup_database(db_path: str = 'interviews.db') -> bool:
     """
     Clean up the database by archiving completed interviews and removing old data.
@@ -102,48 +415,32 @@ def cleanup_database(db_path: str = 'interviews.db') -> bool:
         bool: True if cleanup was successful, False otherwise
     """
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         cursor = conn.cursor()
        
-        # Create archive tables if they don't exist
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS archived_questions (
-            candidate_id TEXT PRIMARY KEY,
-            phone_number TEXT,
-            questions TEXT,
-            created_at TIMESTAMP,
-            status TEXT,
-            interview_complete BOOLEAN,
-            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-       
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS archived_chat_history (
-            id INTEGER PRIMARY KEY,
-            candidate_id TEXT,
-            question TEXT,
-            answer TEXT,
-            timestamp TIMESTAMP,
-            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-       
-        # Archive completed interviews
+        # Archive completed interviews, folding their questions back into a JSON list
         cursor.execute('''
-        INSERT INTO archived_questions
-        SELECT *, CURRENT_TIMESTAMP
-        FROM questions
-        WHERE status = 'completed' OR interview_complete = TRUE
+        INSERT OR REPLACE INTO archived_questions
+        (candidate_id, phone_number, questions, created_at, status, interview_complete, jd_id, cv_id, archived_at)
+        SELECT q.candidate_id, q.phone_number,
+               (SELECT json_group_array(question)
+                FROM (SELECT question FROM interview_questions iq
+                      WHERE iq.candidate_id = q.candidate_id
+                      ORDER BY position)),
+               q.created_at, q.status, q.interview_complete, q.jd_id, q.cv_id, CURRENT_TIMESTAMP
+        FROM questions q
+        WHERE q.status = 'completed' OR q.interview_complete = 1
         ''')
        
         # Archive associated chat history
         cursor.execute('''
-        INSERT INTO archived_chat_history
-        SELECT ch.*, CURRENT_TIMESTAMP
+        INSERT OR REPLACE INTO archived_chat_history
+        (id, candidate_id, jd_id, cv_id, question, answer, timestamp, archived_at)
+        SELECT ch.id, ch.candidate_id, q.jd_id, q.cv_id, ch.question, ch.answer, ch.timestamp, CURRENT_TIMESTAMP
         FROM chat_history ch
         INNER JOIN questions q ON ch.candidate_id = q.candidate_id
-        WHERE q.status = 'completed' OR q.interview_complete = TRUE
+        WHERE q.status = 'completed' OR q.interview_complete = 1
+        ORDER BY ch.id
         ''')
        
         # Delete archived records from original tables
@@ -152,13 +449,22 @@ def cleanup_database(db_path: str = 'interviews.db') -> bool:
         WHERE candidate_id IN (
             SELECT candidate_id
             FROM questions
-            WHERE status = 'completed' OR interview_complete = TRUE
+            WHERE status = 'completed' OR interview_complete = 1
         )
         ''')
        
+        cursor.execute('''
+        DELETE FROM interview_questions
+        WHERE candidate_id IN (
+            SELECT candidate_id
+            FROM questions
+            WHERE status = 'completed' OR interview_complete = 1
+        )
+        ''')
+
         cursor.execute('''
         DELETE FROM questions
-        WHERE status = 'completed' OR interview_complete = TRUE
+        WHERE status = 'completed' OR interview_complete = 1
         ''')
        
         conn.commit()
@@ -173,70 +479,114 @@ def cleanup_database(db_path: str = 'interviews.db') -> bool:
         print(f"Error during database cleanup: {e}")
         return False
  
+def render_history_page(db_path: str, candidate_id: str, data_version: tuple):
+    """Render one page of chat history with keyset prev/next navigation."""
+    # Stack of page start cursors, reset when the filter changes
+    if st.session_state.get("history_filter") != candidate_id:
+        st.session_state.history_filter = candidate_id
+        st.session_state.history_cursors = [0]
+    cursors = st.session_state.history_cursors
+
+    page = get_chat_history_page(db_path, candidate_id, cursors[-1], data_version)
+    st.dataframe(page)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("Next", disabled=len(page) < PAGE_SIZE):
+            cursors.append(page[-1]["id"])
+            st.rerun()
+
+def render_analysis(analysis_result: dict):
+    # Display results in organized sections
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Relevance Score", f"{analysis_result['response_quality']['relevance']:.0f}%")
+    with col2:
+        st.metric("Clarity Score", f"{analysis_result['response_quality']['clarity']:.0f}%")
+    with col3:
+        st.metric("Completeness Score", f"{analysis_result['response_quality']['completeness']:.0f}%")
+
+    st.divider()
+    
+    # Strengths and Improvements
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("💪 Key Strengths")
+        for strength in analysis_result['key_strengths']:
+            st.write(f"• {strength}")
+    
+    with col2:
+        st.subheader("🎯 Areas for Improvement")
+        for area in analysis_result['areas_of_improvement']:
+            st.write(f"• {area}")
+
+    st.divider()
+    
+    
+    st.subheader("📝 Recommendation")
+    for recommendations in analysis_result['recommendations_for_hiring_manager']:
+        st.write(f"• {recommendations}")
+
+    st.metric("Overall Score", f"{analysis_result['overall_score']:.0f}%")
+
+    if analysis_result['overall_score'] >= 75:
+        st.success("Recomended for the interview") 
+    else:
+        st.warning("Candidate did not meet the expectations")
+
 def main():
     st.title("Interview Response Analysis Dashboard")   
     db_path = 'interviews.db'
     
     try:
         if st.session_state.success==True:
-            # Get chat history
-            chat_history = get_chat_history(db_path)
-            
-            if not chat_history:
+            data_version = get_data_version(db_path)
+            if data_version[0] is None and 'last_analysis' not in st.session_state:
                 st.warning("No chat history found in the database.")
                 return
+
+            candidates = get_candidate_ids(db_path, data_version)
+            selected = st.selectbox("Candidate", [ALL_CANDIDATES] + candidates)
+            candidate_id = None if selected == ALL_CANDIDATES else selected
             
-            # Display raw chat history in an expander
+            # Display raw chat history in an expander, one page at a time
             with st.expander("View Raw Chat History"):
-                st.dataframe(pd.DataFrame(chat_history))
+                render_history_page(db_path, candidate_id, data_version)
             
             # Analyze button
             if st.button("Analyze Responses"):
                 with st.spinner("Analyzing responses..."):
-                    analysis_result = analyze_responses(chat_history)
-                    
+                    # Each candidate is scored on their own answers and JD
+                    results = {}
+                    for cid in [candidate_id] if candidate_id else candidates:
+                        chat_history = get_chat_history(db_path, cid, data_version)
+                        if not chat_history:
+                            continue
+                        jd_id, role = get_candidate_role(db_path, cid, data_version)
+                        results[cid] = analyze_responses(chat_history, db_path, jd_id, role)
+                        if "error" not in results[cid]:
+                            save_response_scores(db_path, cid, jd_id, chat_history, results[cid])
+
+                    if not results:
+                        st.warning("No chat history found in the database.")
+                        return
+
+                    # Keep the results so later widget interactions don't recompute them
+                    st.session_state.last_analysis = results
+                    cleanup_database(db_path)
+                    st.rerun()
+
+            for cid, analysis_result in st.session_state.get('last_analysis', {}).items():
+                with st.expander(f"Candidate {cid}", expanded=len(st.session_state.last_analysis) == 1):
                     if "error" in analysis_result:
                         st.error(f"Analysis failed: {analysis_result['error']}")
-                        return
-                    
-                    # Display results in organized sections
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.metric("Relevance Score", f"{analysis_result['response_quality']['relevance']}%")
-                    with col2:
-                        st.metric("Clarity Score", f"{analysis_result['response_quality']['clarity']}%")
-                    with col3:
-                        st.metric("Completeness Score", f"{analysis_result['response_quality']['completeness']}%")
-
-                    st.divider()
-                    
-                    # Strengths and Improvements
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.subheader("💪 Key Strengths")
-                        for strength in analysis_result['key_strengths']:
-                            st.write(f"• {strength}")
-                    
-                    with col2:
-                        st.subheader("🎯 Areas for Improvement")
-                        for area in analysis_result['areas_of_improvement']:
-                            st.write(f"• {area}")
-
-                    st.divider()
-                    
-                    
-                    st.subheader("📝 Recommendation")
-                    for recommendations in analysis_result['recommendations_for_hiring_manager']:
-                        st.write(f"• {recommendations}")
-
-                    st.metric("Overall Score", f"{analysis_result['overall_score']}%")
-
-                    if analysis_result['overall_score'] >= 75:
-                        st.success("Recomended for the interview") 
                     else:
-                        st.warning("Candidate did not meet the expectations")
-                    cleanup_database(db_path)    
+                        render_analysis(analysis_result)
         else:
             st.warning("Please ensure that the Initial Screening Process is done for the candidate")    
                 
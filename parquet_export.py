@@ -0,0 +1,193 @@
+# parquet_export.py
+"""
+Incremental Parquet export of the interview database for reporting.
+
+Copies new rows of the reporting tables into hive-partitioned Parquet
+files, so reporting queries (pyarrow.dataset, DuckDB, pandas) scan columnar
+files instead of the SQLite database the bot writes to:
+
+    <out>/<table>/date=YYYY-MM-DD/jd=<jd_id>/part-<first>-<last>.parquet
+
+Each table is read in watermark order (its id, or archive_seq for the
+archive tables) past a per-table watermark kept in
+<out>/_watermarks.json, which is advanced after every written batch. A run
+interrupted between writing a batch and saving the watermark exports that
+batch again on the next run, so rows are delivered at least once; readers
+that need exactly-once can deduplicate on the watermark column.
+
+    python parquet_export.py
+    python parquet_export.py --db interviews.db --out reporting --batch-size 5000
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+from collections import defaultdict
+from typing import NamedTuple
+import pyarrow as pa
+import pyarrow.parquet as pq
+from db import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+class Export(NamedTuple):
+    """
+    How one table is exported.
+
+    query reads one batch past the watermark, taking (watermark, limit), and
+    returns the watermark column and the partitioning "jd_id". watermark
+    must only grow as rows are added. schema is fixed so every part file of
+    a table has the same column types, even when a batch is all NULL.
+    """
+    query: str
+    watermark: str
+    date_column: str
+    schema: pa.Schema
+
+EXPORTS = {
+    "chat_history": Export('''
+        SELECT ch.id, ch.candidate_id, q.jd_id, ch.question, ch.answer, ch.timestamp
+        FROM chat_history ch LEFT JOIN questions q ON q.candidate_id = ch.candidate_id
+        WHERE ch.id > ? ORDER BY ch.id LIMIT ?
+    ''', "id", "timestamp", pa.schema([
+        ("id", pa.int64()), ("candidate_id", pa.string()), ("jd_id", pa.string()),
+        ("question", pa.string()), ("answer", pa.string()), ("timestamp", pa.string())
+    ])),
+    # Archived rows keep their original ids, which arrive out of order as
+    # candidates finish; archive_seq follows the order they were archived
+    "archived_chat_history": Export('''
+        SELECT archive_seq, id, candidate_id, jd_id, cv_id, question, answer, timestamp, archived_at
+        FROM archived_chat_history
+        WHERE archive_seq > ? ORDER BY archive_seq LIMIT ?
+    ''', "archive_seq", "archived_at", pa.schema([
+        ("archive_seq", pa.int64()), ("id", pa.int64()), ("candidate_id", pa.string()),
+        ("jd_id", pa.string()), ("cv_id", pa.string()), ("question", pa.string()),
+        ("answer", pa.string()), ("timestamp", pa.string()), ("archived_at", pa.string())
+    ])),
+    # Phone numbers stay out of the reporting copy
+    "archived_questions": Export('''
+        SELECT archive_seq, candidate_id, jd_id, cv_id, questions, created_at, status,
+               interview_complete, archived_at
+        FROM archived_questions
+        WHERE archive_seq > ? ORDER BY archive_seq LIMIT ?
+    ''', "archive_seq", "archived_at", pa.schema([
+        ("archive_seq", pa.int64()), ("candidate_id", pa.string()), ("jd_id", pa.string()),
+        ("cv_id", pa.string()), ("questions", pa.string()), ("created_at", pa.string()),
+        ("status", pa.string()), ("interview_complete", pa.int64()), ("archived_at", pa.string())
+    ])),
+    "analysis_results": Export('''
+        SELECT id, request_key, jd_id, cv_id, compatibility_score, next_steps, result, created_at
+        FROM analysis_results
+        WHERE id > ? ORDER BY id LIMIT ?
+    ''', "id", "created_at", pa.schema([
+        ("id", pa.int64()), ("request_key", pa.string()), ("jd_id", pa.string()),
+        ("cv_id", pa.string()), ("compatibility_score", pa.int64()), ("next_steps", pa.string()),
+        ("result", pa.string()), ("created_at", pa.string())
+    ])),
+    "response_scores": Export('''
+        SELECT id, candidate_id, jd_id, first_chat_id, last_chat_id, answers, overall_score,
+               clarity, completeness, relevance, result, created_at
+        FROM response_scores
+        WHERE id > ? ORDER BY id LIMIT ?
+    ''', "id", "created_at", pa.schema([
+        ("id", pa.int64()), ("candidate_id", pa.string()), ("jd_id", pa.string()),
+        ("first_chat_id", pa.int64()), ("last_chat_id", pa.int64()), ("answers", pa.int64()),
+        ("overall_score", pa.float64()), ("clarity", pa.float64()), ("completeness", pa.float64()),
+        ("relevance", pa.float64()), ("result", pa.string()), ("created_at", pa.string())
+    ]))
+}
+WATERMARKS_FILE = "_watermarks.json"
+
+def open_readonly(db_path: str) -> sqlite3.Connection:
+    """Read-only connection; the export never migrates or locks for writing."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def load_watermarks(out_dir: str) -> dict:
+    path = os.path.join(out_dir, WATERMARKS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_watermarks(out_dir: str, watermarks: dict):
+    """Replace the watermarks file atomically."""
+    path = os.path.join(out_dir, WATERMARKS_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def partition_value(value) -> str:
+    """A value safe to use as a partition directory name."""
+    text = str(value) if value not in (None, "") else "unknown"
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in text)
+
+def watermark_key(table: str, spec: Export) -> str:
+    """Watermarks file key; includes the column so one saved against another column is not reused."""
+    return table if spec.watermark == "id" else f"{table}.{spec.watermark}"
+
+def write_partitions(out_dir: str, table: str, rows: list, spec: Export) -> int:
+    """Write one batch as a part file per (date, JD) partition; returns files written."""
+    partitions = defaultdict(list)
+    for row in rows:
+        date = partition_value(str(row[spec.date_column] or "")[:10])
+        partitions[(date, partition_value(row["jd_id"]))].append(dict(row))
+
+    for (date, jd), records in partitions.items():
+        directory = os.path.join(out_dir, table, f"date={date}", f"jd={jd}")
+        os.makedirs(directory, exist_ok=True)
+        first, last = records[0][spec.watermark], records[-1][spec.watermark]
+        path = os.path.join(directory, f"part-{first}-{last}.parquet")
+        # Written under a temporary name so readers never see a partial file
+        pq.write_table(pa.Table.from_pylist(records, schema=spec.schema), path + ".tmp")
+        os.replace(path + ".tmp", path)
+    return len(partitions)
+
+def table_columns(conn: sqlite3.Connection, table: str) -> set:
+    """Columns of a table; empty if it does not exist."""
+    return {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def export(db_path: str, out_dir: str, batch_size: int = 10000, tables: list = None) -> dict:
+    """Export rows added since the last run; returns rows exported per table."""
+    os.makedirs(out_dir, exist_ok=True)
+    watermarks = load_watermarks(out_dir)
+    exported = {}
+    conn = open_readonly(db_path)
+    try:
+        for table in tables or EXPORTS:
+            spec = EXPORTS[table]
+            key = watermark_key(table, spec)
+            if spec.watermark not in table_columns(conn, table):
+                logger.info(f"{table}: not in this database (or not migrated) yet, skipped")
+                continue
+            exported[table] = 0
+            while True:
+                rows = conn.execute(spec.query, (watermarks.get(key, 0), batch_size)).fetchall()
+                if not rows:
+                    break
+                files = write_partitions(out_dir, table, rows, spec)
+                watermarks[key] = rows[-1][spec.watermark]
+                save_watermarks(out_dir, watermarks)
+                exported[table] += len(rows)
+                logger.info(f"{table}: {len(rows)} rows into {files} partition(s), watermark {watermarks[key]}")
+    finally:
+        conn.close()
+    return exported
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--out", default="reporting", help="Output directory")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--table", action="append", choices=sorted(EXPORTS), help="Export only these tables")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    exported = export(args.db, args.out, args.batch_size, args.table)
+    for table, count in exported.items():
+        print(f"{table}: {count} new rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# question_bank.py
+import sqlite3
+import hashlib
+import math
+import re
+import time
+import logging
+from array import array
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+BANK_DB_PATH = 'question_bank.db'
+EMBEDDING_DIM = 512
+# Minimum cosine similarity for a tag to be served from the bank
+SIMILARITY_THRESHOLD = 0.75
+# Questions kept per category when merging bank and generated questions
+MAX_PER_CATEGORY = 2
+QUESTION_CATEGORIES = ("situational", "cultural_fit", "adaptability", "collaboration", "growth")
+
+def jd_key(jd: str) -> str:
+    """Stable key for a job description, insensitive to whitespace and case."""
+    normalized = " ".join(jd.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def embed(text: str) -> array:
+    """
+    Embed text locally using feature hashing over words and word bigrams.
+
+    Args:
+        text (str): Tag text to embed
+
+    Returns:
+        array: L2-normalized float vector of EMBEDDING_DIM dimensions
+    """
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = array('f', [0.0]) * EMBEDDING_DIM
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % EMBEDDING_DIM
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[bucket] += sign
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm:
+        for i in range(EMBEDDING_DIM):
+            vector[i] /= norm
+    return vector
+
+def cosine(a: array, b: array) -> float:
+    """Cosine similarity of two normalized vectors."""
+    return sum(x * y for x, y in zip(a, b))
+
+class QuestionBank:
+    """
+    Persistent bank of generated questions indexed by JD and tag set.
+
+    The question task writes one set of questions for all the tags it is
+    given, so a set is stored once under the whole set of tags (a gap set)
+    and served only when every one of those tags matches a tag of the new
+    analysis.
+    """
+
+    def __init__(self, db_path: str = BANK_DB_PATH, threshold: float = SIMILARITY_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.init_sqlite()
+
+    def init_sqlite(self):
+        """Initialize the bank tables"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        # Superseded: stored every question under every tag of its request,
+        # so entries cannot be attributed; the bank refills as it is used
+        cursor.execute('DROP TABLE IF EXISTS bank_questions')
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bank_sets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            jd_hash TEXT,
+            created_at TIMESTAMP
+        )
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bank_sets_jd
+        ON bank_sets (jd_hash)
+        ''')
+        # The tags a set was generated for
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bank_set_tags (
+            set_id INTEGER REFERENCES bank_sets (id),
+            kind TEXT,
+            tag TEXT,
+            embedding BLOB
+        )
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bank_set_tags_set
+        ON bank_set_tags (set_id)
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bank_set_questions (
+            set_id INTEGER REFERENCES bank_sets (id),
+            category TEXT,
+            question TEXT
+        )
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bank_set_questions_set
+        ON bank_set_questions (set_id)
+        ''')
+
+        # Lookup outcomes for hit rate and generation time reporting
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bank_lookups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            jd_hash TEXT,
+            tags_total INTEGER,
+            tags_hit INTEGER,
+            generation_seconds REAL,
+            created_at TIMESTAMP
+        )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def lookup(self, jd: str, tags: List[Tuple[str, str]]) -> Tuple[Dict[str, List[str]], List[Tuple[str, str]]]:
+        """
+        Serve the banked question sets whose tags all closely match tags of
+        this request.
+
+        Args:
+            jd (str): Job description the questions are for
+            tags (list): (kind, text) pairs, kind being 'strength' or 'concern'
+
+        Returns:
+            tuple: (questions by category, tags no served set covers)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT t.set_id, t.kind, t.embedding
+        FROM bank_set_tags t JOIN bank_sets s ON s.id = t.set_id
+        WHERE s.jd_hash = ?
+        ORDER BY t.set_id DESC
+        ''', (jd_key(jd),))
+        rows = cursor.fetchall()
+
+        # Request tags each banked set covers; None once one of its tags has no match
+        queries = [(kind, embed(text)) for kind, text in tags]
+        covers = {}
+        for set_id, kind, blob in rows:
+            if set_id in covers and covers[set_id] is None:
+                continue
+            stored = array('f', blob)
+            best_index, best_score = None, 0.0
+            for index, (query_kind, query) in enumerate(queries):
+                if query_kind != kind:
+                    continue
+                score = cosine(query, stored)
+                if score > best_score:
+                    best_index, best_score = index, score
+            if best_index is None or best_score < self.threshold:
+                covers[set_id] = None
+            else:
+                covers.setdefault(set_id, set()).add(best_index)
+
+        # Largest sets first, newest first among equals
+        served, covered = [], set()
+        for set_id, indexes in sorted(
+            ((set_id, indexes) for set_id, indexes in covers.items() if indexes),
+            key=lambda item: (-len(item[1]), -item[0])
+        ):
+            if not indexes <= covered:
+                served.append(set_id)
+                covered |= indexes
+
+        questions = {category: [] for category in QUESTION_CATEGORIES}
+        if served:
+            cursor.execute(
+                f'SELECT set_id, category, question FROM bank_set_questions WHERE set_id IN ({", ".join("?" * len(served))})',
+                served
+            )
+            by_set = {}
+            for set_id, category, question in cursor.fetchall():
+                by_set.setdefault(set_id, []).append((category, question))
+            for set_id in served:
+                for category, question in by_set.get(set_id, []):
+                    questions.setdefault(category, []).append(question)
+
+        conn.close()
+        missing = [tag for index, tag in enumerate(tags) if index not in covered]
+        return questions, missing
+
+    def add(self, jd: str, tags: List[Tuple[str, str]], questions: Dict[str, List[str]]):
+        """Store questions once, as a set generated for all of the given tags."""
+        if not tags or not any(questions.values()):
+            return
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO bank_sets (jd_hash, created_at) VALUES (?, ?)',
+            (jd_key(jd), datetime.utcnow().isoformat())
+        )
+        set_id = cursor.lastrowid
+        cursor.executemany(
+            'INSERT INTO bank_set_tags (set_id, kind, tag, embedding) VALUES (?, ?, ?, ?)',
+            [(set_id, kind, text, embed(text).tobytes()) for kind, text in dict.fromkeys(tags)]
+        )
+        cursor.executemany(
+            'INSERT INTO bank_set_questions (set_id, category, question) VALUES (?, ?, ?)',
+            [
+                (set_id, category, question)
+                for category, items in questions.items()
+                for question in dict.fromkeys(items)
+            ]
+        )
+        conn.commit()
+        conn.close()
+
+    def record(self, jd: str, tags_total: int, tags_hit: int, generation_seconds: float):
+        """Record the outcome of one lookup."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT INTO bank_lookups (jd_hash, tags_total, tags_hit, generation_seconds, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (jd_key(jd), tags_total, tags_hit, generation_seconds, datetime.utcnow().isoformat()))
+        conn.commit()
+        conn.close()
+
+    def stats(self) -> dict:
+        """Hit rate and generation time across all recorded lookups."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT COUNT(*),
+               COALESCE(SUM(tags_total), 0),
+               COALESCE(SUM(tags_hit), 0),
+               COALESCE(SUM(tags_hit = tags_total), 0),
+               COALESCE(AVG(generation_seconds), 0),
+               COALESCE(AVG(CASE WHEN tags_hit < tags_total THEN generation_seconds END), 0)
+        FROM bank_lookups
+        ''')
+        lookups, tags_total, tags_hit, full_hits, avg_seconds, avg_generated = cursor.fetchone()
+        cursor.execute('SELECT COUNT(*) FROM bank_set_questions')
+        entries = cursor.fetchone()[0]
+        conn.close()
+        return {
+            "lookups": lookups,
+            "entries": entries,
+            "tag_hit_rate": tags_hit / tags_total if tags_total else 0.0,
+            "full_hit_rate": full_hits / lookups if lookups else 0.0,
+            "avg_seconds": avg_seconds,
+            "avg_generation_seconds": avg_generated
+        }
+
+def analysis_tags(analysis: dict) -> List[Tuple[str, str]]:
+    """Concern and strength tags of an analysis."""
+    tags = [("concern", text) for text in analysis.get("potential_concerns", [])]
+    tags += [("strength", text) for text in analysis.get("strengths", [])]
+    return tags
+
+def merge_questions(*sources: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Merge question sets per category, dropping duplicates and capping each category."""
+    merged = {category: [] for category in QUESTION_CATEGORIES}
+    for source in sources:
+        for category, items in source.items():
+            bucket = merged.setdefault(category, [])
+            for question in items:
+                if question not in bucket and len(bucket) < MAX_PER_CATEGORY:
+                    bucket.append(question)
+    return merged
+
+def timed(fn, *args, **kwargs):
+    """Call fn and return (result, elapsed seconds)."""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
@@ -0,0 +1,167 @@
+# registration.py
+import hashlib
+import math
+import time
+from typing import Callable, Iterable, Optional
+
+# Candidate sets larger than this are held in a Bloom filter instead of a set
+BLOOM_THRESHOLD = 200_000
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+# Seconds an unknown sender stays cached as unregistered
+NEGATIVE_TTL = 300
+# Seconds between full reloads, run in the background by the bot
+REFRESH_INTERVAL = 600
+# Minimum seconds between "not registered" replies to the same sender
+REPLY_INTERVAL = 60
+# Size at which expired negative-cache and reply entries are pruned
+PRUNE_AT = 10_000
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys."""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class RegistrationCache:
+    """
+    In-process view of registered candidate ids.
+
+    Known candidates are answered from memory. Unknown senders are checked
+    against the database once and then cached as unregistered for a TTL.
+
+    With a Bloom filter, a miss is final: ids added since the load are in
+    the filter too. A hit is confirmed against the database once, since the
+    filter cannot forget archived candidates, and confirmed ids are then
+    answered from memory.
+
+    The owner removes archived candidates with discard() and, when
+    reload_due(), fetches the ids off the message path and passes them to
+    replace(); ids added while that fetch runs are kept.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[str]], checker: Callable[[str], bool],
+                 negative_ttl: float = NEGATIVE_TTL, refresh_interval: float = REFRESH_INTERVAL,
+                 reply_interval: float = REPLY_INTERVAL, bloom_threshold: int = BLOOM_THRESHOLD):
+        self.loader = loader
+        self.checker = checker
+        self.negative_ttl = negative_ttl
+        self.refresh_interval = refresh_interval
+        self.reply_interval = reply_interval
+        self.bloom_threshold = bloom_threshold
+        self.members = set()
+        self.bloom: Optional[BloomFilter] = None
+        # Bloom positives confirmed in the database
+        self.confirmed = set()
+        # Ids added since a reload began, or None when no reload is running
+        self.added_during_reload: Optional[set] = None
+        self.unknown = {}
+        self.last_reply = {}
+        self.loaded_at = 0.0
+        self.db_checks = 0
+
+    def load(self):
+        """Reload all registered ids from the database."""
+        self.replace(self.loader())
+
+    def reload_started(self):
+        """Call before fetching ids for replace() from another thread."""
+        self.added_during_reload = set()
+
+    def reload_due(self) -> bool:
+        return time.monotonic() - self.loaded_at > self.refresh_interval
+
+    def replace(self, ids: Iterable[str]):
+        """Replace the registered ids with a fresh load."""
+        added = self.added_during_reload or set()
+        ids = list(ids)
+        ids.extend(added)
+        self.added_during_reload = None
+        # Ids just added are known to be registered
+        self.confirmed = set(added)
+        if len(ids) > self.bloom_threshold:
+            self.bloom = BloomFilter(len(ids) * 2)
+            for candidate_id in ids:
+                self.bloom.add(candidate_id)
+            self.members = set()
+        else:
+            self.bloom = None
+            self.members = set(ids)
+        self.unknown.clear()
+        self.loaded_at = time.monotonic()
+
+    def add(self, candidate_id: str):
+        if self.bloom is not None:
+            self.bloom.add(candidate_id)
+            self.confirmed.add(candidate_id)
+        else:
+            self.members.add(candidate_id)
+        if self.added_during_reload is not None:
+            self.added_during_reload.add(candidate_id)
+        self.unknown.pop(candidate_id, None)
+
+    def discard(self, candidate_id: str):
+        """Forget an archived candidate until it is added again."""
+        # A Bloom filter cannot remove keys; dropping the confirmation means
+        # a later hit is checked in the database again
+        self.members.discard(candidate_id)
+        self.confirmed.discard(candidate_id)
+        if self.added_during_reload is not None:
+            self.added_during_reload.discard(candidate_id)
+
+    def _check_db(self, candidate_id: str) -> bool:
+        self.db_checks += 1
+        return self.checker(candidate_id)
+
+    def is_registered(self, candidate_id: str) -> bool:
+        now = time.monotonic()
+        if self.bloom is not None:
+            if candidate_id not in self.bloom:
+                return False
+            if candidate_id in self.confirmed:
+                return True
+        elif candidate_id in self.members:
+            return True
+
+        expires = self.unknown.get(candidate_id)
+        if expires is not None and expires > now:
+            return False
+
+        # A Bloom hit to confirm, or registered elsewhere since the last load
+        if self._check_db(candidate_id):
+            self.add(candidate_id)
+            return True
+        if len(self.unknown) >= PRUNE_AT:
+            self.unknown = {key: value for key, value in self.unknown.items() if value > now}
+        self.unknown[candidate_id] = now + self.negative_ttl
+        return False
+
+    def should_reply(self, sender_id: str) -> bool:
+        """Rate-limit "not registered" replies per sender."""
+        now = time.monotonic()
+        last = self.last_reply.get(sender_id)
+        if last is not None and now - last < self.reply_interval:
+            return False
+        if len(self.last_reply) >= PRUNE_AT:
+            self.last_reply = {
+                key: value for key, value in self.last_reply.items()
+                if now - value < self.reply_interval
+            }
+        self.last_reply[sender_id] = now
+        return True
@@ -0,0 +1,64 @@
+# routing.py
+"""
+Per-agent model routing.
+
+Each agent is routed to a model tier: "small" for high-volume, structured
+work (question generation, per-chunk answer scoring) and "strong" for the
+profile analysis and the final assessment. When a small model's output fails
+validation, the retry escalates to the next tier up.
+
+Override routes with MODEL_ROUTES, e.g.
+    MODEL_ROUTES="question_generator=strong,response_chunk=small"
+"""
+import os
+from typing import Dict, Optional
+from lazy import crewai
+
+MODEL_TIERS = {
+    "small": os.getenv("SMALL_MODEL_NAME", "gpt-4o-mini"),
+    "strong": os.getenv("STRONG_MODEL_NAME", os.getenv("OPENAI_MODEL_NAME", "gpt-4o"))
+}
+# Tier to retry on when output fails validation
+ESCALATION = {"small": "strong"}
+DEFAULT_ROUTES = {
+    "profile_analyzer": "strong",
+    "question_generator": "small",
+    "communication_agent": "small",
+    # Response analysis: per-chunk scoring, and the final/reduce assessment
+    "response_chunk": "small",
+    "response_final": "strong"
+}
+# USD per million (input, output) tokens, for cost reporting
+MODEL_COSTS = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00)
+}
+
+def parse_routes(spec: str) -> Dict[str, str]:
+    """Parse "agent=tier,agent=tier" into a routes dict."""
+    routes = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        agent, _, tier = item.partition("=")
+        if tier.strip() not in MODEL_TIERS:
+            raise ValueError(f"Unknown model tier in MODEL_ROUTES: {item}")
+        routes[agent.strip()] = tier.strip()
+    return routes
+
+ROUTES = {**DEFAULT_ROUTES, **parse_routes(os.getenv("MODEL_ROUTES", ""))}
+
+def route(agent: str, routes: Dict[str, str] = None) -> str:
+    """Model tier for an agent."""
+    return (routes or ROUTES).get(agent, "strong")
+
+def escalate(tier: str) -> Optional[str]:
+    """The tier to retry on after a validation failure, if any."""
+    return ESCALATION.get(tier)
+
+def build_llm(tier: str, stream: bool = False):
+    """A crewai LLM for a model tier."""
+    return crewai().LLM(model=MODEL_TIERS[tier], stream=stream)
+
+def call_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost of one call; 0 for models without a price."""
+    input_price, output_price = MODEL_COSTS.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
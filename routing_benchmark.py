@@ -0,0 +1,139 @@
+# routing_benchmark.py
+"""
+Offline model-routing benchmark.
+
+Simulates the screening pipeline (profile analysis, then question
+generation) and the response analysis (parallel chunk scoring, then the
+final assessment) for a batch of candidates under several routing configs,
+and reports latency and cost per candidate. No model is called: each model
+is described by a latency and JSON-failure profile, by default rough public
+figures, or measured ones passed with --profiles.
+
+    python routing_benchmark.py
+    python routing_benchmark.py --candidates 2000 --profiles measured.json
+
+A profiles file maps model name to {"ttft", "seconds_per_token", "json_failure_rate"}.
+"""
+import argparse
+import json
+import random
+from routing import DEFAULT_ROUTES, ESCALATION, MODEL_TIERS, call_cost
+from transcript import estimate_tokens
+
+DEFAULT_PROFILES = {
+    "gpt-4o-mini": {"ttft": 0.5, "seconds_per_token": 0.012, "json_failure_rate": 0.08},
+    "gpt-4o": {"ttft": 0.8, "seconds_per_token": 0.020, "json_failure_rate": 0.02}
+}
+# Prompt overhead and typical output size per agent route, in tokens
+PROMPT_TOKENS = {"profile_analyzer": 350, "question_generator": 300, "response_chunk": 250, "response_final": 250}
+OUTPUT_TOKENS = {"profile_analyzer": 450, "question_generator": 350, "response_chunk": 300, "response_final": 400}
+
+CONFIGS = {
+    "all-strong": ({route: "strong" for route in DEFAULT_ROUTES}, ESCALATION),
+    "all-small": ({route: "small" for route in DEFAULT_ROUTES}, ESCALATION),
+    "routed": (DEFAULT_ROUTES, ESCALATION),
+    "routed-no-escalation": (DEFAULT_ROUTES, {})
+}
+
+class Simulator:
+    def __init__(self, profiles: dict, rng: random.Random):
+        self.profiles = profiles
+        self.rng = rng
+
+    def call(self, model: str, input_tokens: int, output_tokens: int) -> tuple:
+        """(seconds, cost, output parsed) for one simulated call."""
+        profile = self.profiles[model]
+        seconds = (profile["ttft"] + output_tokens * profile["seconds_per_token"]) * self.rng.lognormvariate(0, 0.25)
+        parsed = self.rng.random() >= profile["json_failure_rate"]
+        return seconds, call_cost(model, input_tokens, output_tokens), parsed
+
+    def stage(self, route: str, input_tokens: int, routes: dict, escalation: dict, stats: dict) -> tuple:
+        """Run one stage with one re-prompt, escalating the retry if configured."""
+        tier = routes[route]
+        input_tokens += PROMPT_TOKENS[route]
+        seconds = cost = 0.0
+        for attempt in range(2):
+            call_seconds, call_cost_usd, parsed = self.call(MODEL_TIERS[tier], input_tokens, OUTPUT_TOKENS[route])
+            seconds += call_seconds
+            cost += call_cost_usd
+            stats["calls"] += 1
+            if parsed:
+                return seconds, cost
+            if attempt == 0 and tier in escalation:
+                tier = escalation[tier]
+                stats["escalations"] += 1
+        stats["failures"] += 1
+        return seconds, cost
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def benchmark(routes: dict, escalation: dict, profiles: dict, candidates: int, cv_tokens: int,
+              jd_tokens: int, transcript_chunks: int, chunk_tokens: int, seed: int) -> dict:
+    simulator = Simulator(profiles, random.Random(seed))
+    stats = {"calls": 0, "escalations": 0, "failures": 0}
+    screening, responses, costs = [], [], []
+    for _ in range(candidates):
+        analysis_seconds, analysis_cost = simulator.stage("profile_analyzer", cv_tokens + jd_tokens, routes, escalation, stats)
+        questions_seconds, questions_cost = simulator.stage("question_generator", OUTPUT_TOKENS["profile_analyzer"], routes, escalation, stats)
+        screening.append(analysis_seconds + questions_seconds)
+
+        # Chunks are scored in parallel, then reduced
+        chunk_results = [
+            simulator.stage("response_chunk", chunk_tokens + jd_tokens, routes, escalation, stats)
+            for _ in range(transcript_chunks)
+        ]
+        final_seconds, final_cost = simulator.stage(
+            "response_final", transcript_chunks * OUTPUT_TOKENS["response_chunk"], routes, escalation, stats
+        )
+        responses.append(max(seconds for seconds, _ in chunk_results) + final_seconds)
+        costs.append(analysis_cost + questions_cost + sum(cost for _, cost in chunk_results) + final_cost)
+
+    return {
+        "screening_mean": sum(screening) / candidates,
+        "screening_p95": percentile(screening, 0.95),
+        "responses_mean": sum(responses) / candidates,
+        "responses_p95": percentile(responses, 0.95),
+        "cost_per_candidate": sum(costs) / candidates,
+        "escalation_rate": stats["escalations"] / stats["calls"],
+        "failure_rate": stats["failures"] / stats["calls"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--cv-tokens", type=int, default=1200, help="Tokens in a typical CV")
+    parser.add_argument("--jd", default="jd.txt", help="Job description used for the prompt size")
+    parser.add_argument("--chunks", type=int, default=3, help="Transcript chunks per candidate")
+    parser.add_argument("--chunk-tokens", type=int, default=1500)
+    parser.add_argument("--profiles", help="JSON file of measured model profiles")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    profiles = dict(DEFAULT_PROFILES)
+    if args.profiles:
+        with open(args.profiles, "r", encoding="utf-8") as f:
+            profiles.update(json.load(f))
+    missing = set(MODEL_TIERS.values()) - set(profiles)
+    if missing:
+        parser.error(f"No profile for model(s): {', '.join(sorted(missing))}")
+    with open(args.jd, "r", encoding="utf-8") as f:
+        jd_tokens = estimate_tokens(f.read())
+
+    print(f"{args.candidates} candidates, models: " + ", ".join(f"{tier}={model}" for tier, model in MODEL_TIERS.items()))
+    print(f"{'config':<22}{'screen mean':>12}{'screen p95':>12}{'resp mean':>11}{'resp p95':>10}"
+          f"{'$/cand':>9}{'escalated':>11}{'failed':>8}")
+    for name, (routes, escalation) in CONFIGS.items():
+        result = benchmark(
+            routes, escalation, profiles, args.candidates, args.cv_tokens,
+            jd_tokens, args.chunks, args.chunk_tokens, args.seed
+        )
+        print(
+            f"{name:<22}{result['screening_mean']:>11.1f}s{result['screening_p95']:>11.1f}s"
+            f"{result['responses_mean']:>10.1f}s{result['responses_p95']:>9.1f}s"
+            f"{result['cost_per_candidate']:>9.4f}{result['escalation_rate']:>10.1%}{result['failure_rate']:>8.1%}"
+        )
+
+if __name__ == "__main__":
+    main()
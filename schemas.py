@@ -0,0 +1,69 @@
+# schemas.py
+"""
+Response models shared by the API and the crew tasks.
+
+CompatibilityResponse extends ProfileAnalysis, the analysis task's output
+model, so the structured output the model is asked for and the API
+response cannot drift apart.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, List
+from pydantic import BaseModel, Field, TypeAdapter
+
+class ProfileAnalysis(BaseModel):
+    """Output of the profile analysis task"""
+    compatibility_score: int = Field(ge=0, le=100)
+    strengths: List[str]
+    potential_concerns: List[str]
+    work_style_indicators: List[str]
+    culture_fit_aspects: List[str]
+    adaptability_signals: List[str]
+
+class QuestionCategories(BaseModel):
+    situational: List[str]
+    cultural_fit: List[str]
+    adaptability: List[str]
+    collaboration: List[str]
+    growth: List[str]
+
+class GeneratedQuestions(BaseModel):
+    """Output of the question generation task"""
+    questions: QuestionCategories
+
+class ResponseQuality(BaseModel):
+    clarity: float = Field(ge=0, le=100)
+    completeness: float = Field(ge=0, le=100)
+    relevance: float = Field(ge=0, le=100)
+
+class ResponseAssessment(BaseModel):
+    """Output of the response analysis task, for a whole interview or one chunk of it"""
+    overall_score: float = Field(ge=0, le=100)
+    response_quality: ResponseQuality
+    key_strengths: List[str] = []
+    areas_of_improvement: List[str] = []
+    themes_identified: List[str] = []
+    recommendations_for_hiring_manager: List[str] = []
+
+class CompatibilityResponse(ProfileAnalysis):
+    questions: Dict[str, List[str]]
+    next_steps: str  # Added this required field
+
+@lru_cache(maxsize=None)
+def validator(model: type) -> TypeAdapter:
+    """Compiled validator for a model, built once per model."""
+    return TypeAdapter(model)
+
+def parse_output(model: type, text: str) -> dict:
+    """
+    Validate model output against a schema.
+
+    Raises:
+        ValueError: If the output is not valid JSON for the schema
+            (pydantic's ValidationError is a ValueError)
+    """
+    # Tolerate a markdown fence around the JSON
+    fenced = re.search(r'```(?:json)?\s*([\s\S]*?)```', text)
+    if fenced:
+        text = fenced.group(1)
+    return validator(model).validate_json(text.strip()).model_dump()
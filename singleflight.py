@@ -0,0 +1,163 @@
+# singleflight.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+from db import connect, DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# Longer than any pipeline run; a lease older than this belongs to a dead worker
+LEASE_SECONDS = float(os.getenv("SINGLE_FLIGHT_LEASE_SECONDS", "300"))
+# Finished results are reused for identical requests arriving this soon after
+RESULT_TTL = float(os.getenv("SINGLE_FLIGHT_RESULT_TTL", "600"))
+POLL_INTERVAL = 0.5
+
+class SingleFlightFailed(Exception):
+    """The computation another worker ran for this key failed with an error not in shared_errors"""
+
+def content_key(namespace: str, **fields) -> str:
+    """Stable hash of a request's content."""
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return f"{namespace}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+class SingleFlight:
+    """
+    Collapse concurrent identical computations into one.
+
+    Within a process, callers with the same key await one shared future.
+    Across processes, the analysis_leases table elects one owner per key; the
+    others poll the row until the owner stores the result. A lease that
+    outlives LEASE_SECONDS is taken over, so a crashed worker cannot block a
+    key for good.
+
+    A failure is stored with its exception type. Waiters re-raise it as that
+    type when it is one of shared_errors (constructed from the message) and
+    as SingleFlightFailed otherwise; a new caller retries the computation.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, lease_seconds: float = LEASE_SECONDS,
+                 result_ttl: float = RESULT_TTL, poll_interval: float = POLL_INTERVAL,
+                 shared_errors: tuple = ()):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.shared_errors = {cls.__name__: cls for cls in shared_errors}
+        self.owner = uuid.uuid4().hex
+        self.flights = {}
+        self.counters = dict.fromkeys(("computed", "attached_local", "attached_remote", "served_stored"), 0)
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[str]],
+                  on_attach: Optional[Callable[[], None]] = None) -> str:
+        """
+        Result of compute for key, computing it at most once across callers.
+
+        Results are strings (e.g. JSON) so they can be shared through SQLite.
+        """
+        flight = self.flights.get(key)
+        if flight is not None:
+            self.counters["attached_local"] += 1
+            if on_attach:
+                on_attach()
+            return await asyncio.shield(flight)
+
+        flight = self.flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._run(key, compute, on_attach)
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # Retrieved here so an unawaited future does not log a warning
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self.flights[key]
+
+    async def _run(self, key: str, compute, on_attach) -> str:
+        attached = False
+        while True:
+            # Only a new caller retries a failed key; waiters report the failure
+            row = self._acquire(key, retry_failed=not attached)
+            status, owner, result, error, error_type = row
+            if status == 'done':
+                if not attached:
+                    self.counters["served_stored"] += 1
+                return result
+            if status == 'running' and owner == self.owner:
+                break
+            if status == 'failed':
+                raise self.shared_errors.get(error_type, SingleFlightFailed)(error)
+
+            # Another worker is computing it
+            if not attached:
+                attached = True
+                self.counters["attached_remote"] += 1
+                if on_attach:
+                    on_attach()
+            await asyncio.sleep(self.poll_interval)
+
+        self.counters["computed"] += 1
+        try:
+            result = await compute()
+        except BaseException as e:
+            self._finish(key, 'failed', None, str(e) or type(e).__name__, type(e).__name__)
+            raise
+        self._finish(key, 'done', result, None, None)
+        if self.counters["computed"] % 100 == 0:
+            self.prune()
+        return result
+
+    def _acquire(self, key: str, retry_failed: bool) -> tuple:
+        """Take the lease if the key is free or stale, or failed and retry_failed, and return the row."""
+        now = time.time()
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT INTO analysis_leases (key, owner, status, expires_at, updated_at)
+        VALUES (?, ?, 'running', ?, ?)
+        ON CONFLICT(key) DO UPDATE SET
+            owner = excluded.owner, status = 'running', expires_at = excluded.expires_at,
+            result = NULL, error = NULL, error_type = NULL, updated_at = excluded.updated_at
+        WHERE (analysis_leases.status = 'running' AND analysis_leases.expires_at < ?)
+           OR (analysis_leases.status = 'done' AND analysis_leases.updated_at < ?)
+           OR (analysis_leases.status = 'failed' AND ?)
+        ''', (key, self.owner, now + self.lease_seconds, now, now, now - self.result_ttl, retry_failed))
+        conn.commit()
+        cursor.execute('SELECT status, owner, result, error, error_type FROM analysis_leases WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        conn.close()
+        return row
+
+    def _finish(self, key: str, status: str, result: Optional[str], error: Optional[str],
+                error_type: Optional[str]):
+        conn = connect(self.db_path)
+        conn.execute('''
+        UPDATE analysis_leases SET status = ?, result = ?, error = ?, error_type = ?, updated_at = ?
+        WHERE key = ? AND owner = ?
+        ''', (status, result, error, error_type, time.time(), key, self.owner))
+        conn.commit()
+        conn.close()
+
+    def prune(self):
+        """Delete finished rows past their TTL and expired leases."""
+        now = time.time()
+        conn = connect(self.db_path)
+        conn.execute('''
+        DELETE FROM analysis_leases
+        WHERE (status != 'running' AND updated_at < ?) OR expires_at < ?
+        ''', (now - self.result_ttl, now - self.lease_seconds))
+        conn.commit()
+        conn.close()
+
+    def metrics(self) -> dict:
+        return {"in_flight": len(self.flights), **self.counters}
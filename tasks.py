@@ -1,10 +1,7 @@
 # tasks.py
 from crewai import Task
 import json
-
-# tasks.py
-from crewai import Task
-import json
+from schemas import GeneratedQuestions, ProfileAnalysis
 
 class JobTasks:
     @staticmethod
@@ -38,6 +35,7 @@ class JobTasks:
             - "Schedule initial screening call" (for scores 60-79)
             - "Review additional candidates before proceeding" (for scores below 60)""",
             expected_output="A JSON string containing compatibility analysis",
+            output_pydantic=ProfileAnalysis,
             agent=agent
         )
     
@@ -67,6 +65,7 @@ class JobTasks:
             - Specific to the candidate's background
             - Focused on real workplace scenarios""",
             expected_output="A JSON string containing categorized questions",
+            output_pydantic=GeneratedQuestions,
             agent=agent
         )
     
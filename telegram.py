@@ -1,15 +1,21 @@
 from telethon import TelegramClient, events
-from telethon.tl.types import User
 import asyncio
-import sqlite3
 from datetime import datetime
 import logging
 import os
 from dotenv import load_dotenv
-import json
 from telethon import errors
-import random
-import time
+from db import connect, schema_version
+from registration import RegistrationCache
+from dispatcher import ChatDispatcher
+from entity_cache import EntityCache
+from outbox import Outbox
+from timers import TimerScheduler
+from handoff import HandoffService
+from monitoring import LoopLagSampler, statement_stats
+from adaptive import ADAPTIVE_FOLLOWUPS, is_thin_answer, generate_followup
+from assets import assets
+from typing import NamedTuple
 # Load environment variables
 load_dotenv()
 
@@ -19,50 +25,113 @@ logging.basicConfig(
     level=logging.INFO
 )
 logger = logging.getLogger(__name__)
-with open("question_starters.txt", "r", encoding="utf-8") as file:
-    question_starters = file.readlines()
 # Configuration
 API_ID = os.getenv('TELEGRAM_APP_API_ID_PANDUKA')
 API_HASH = os.getenv('TELEGRAM_APP_API_HASH_PANDUKA')
 DB_PATH = 'interviews.db'
+HANDLER_WORKERS = int(os.getenv('HANDLER_WORKERS', '8'))
+MAX_PENDING_MESSAGES = int(os.getenv('MAX_PENDING_MESSAGES', '1000'))
+# Idle periods (seconds) before a reminder, an auto-pause and expiry of a paused interview
+REMINDER_AFTER = float(os.getenv('REMINDER_AFTER_SECONDS', str(24 * 3600)))
+PAUSE_AFTER = float(os.getenv('PAUSE_AFTER_SECONDS', str(48 * 3600)))
+EXPIRE_AFTER = float(os.getenv('EXPIRE_AFTER_SECONDS', str(7 * 24 * 3600)))
+# Seconds between metrics summaries in the log; 0 disables them
+METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', '60'))
+# Seconds between checks for candidates archived by the dashboard
+ARCHIVE_SYNC_INTERVAL = float(os.getenv('ARCHIVE_SYNC_SECONDS', '30'))
+
+class TimerFired(NamedTuple):
+    """Timer event, dispatched through the candidate's chat queue"""
+    candidate_id: str
+    kind: str
 
 class InterviewClient:
-    def __init__(self, api_id: str, api_hash: str):
-        self.client = TelegramClient('interview_session', api_id, api_hash)
+    def __init__(self, api_id: str, api_hash: str, db_path: str = DB_PATH, client: TelegramClient = None):
+        """client and db_path are injectable, e.g. for load tests against a temporary database"""
+        self.db_path = db_path
+        self.client = client or TelegramClient('interview_session', api_id, api_hash)
         self.active_interviews = {}
+        self.registrations = RegistrationCache(self.load_candidate_ids, self.candidate_exists)
+        self.dispatcher = ChatDispatcher(
+            self.handle_event,
+            workers=HANDLER_WORKERS,
+            max_pending=MAX_PENDING_MESSAGES
+        )
         self.init_sqlite()
+        self.registrations.load()
+        self.archive_seq = self.last_archive_seq()
+        self.registration_sync = None
+        self.entities = EntityCache(self.db_path)
+        self.entities.warm()
+        self.outbox = Outbox(self.client, self.entities.input_peer, self.db_path)
+        self.timers = TimerScheduler(self.on_timer, self.db_path)
+        # Speculative follow-ups by user id: (question index, task)
+        self.followups = {}
+        self.loop_lag = LoopLagSampler()
+        self.metrics_reporter = None
 
     def init_sqlite(self):
-        """Initialize SQLite database and tables"""
-        conn = sqlite3.connect(DB_PATH)
+        """Initialize SQLite database and apply schema migrations"""
+        conn = connect(self.db_path)
+        version = schema_version(conn)
+        conn.close()
+        logger.info(f"SQLite database initialized (schema version {version})")
+
+    def load_candidate_ids(self) -> list:
+        """All registered candidate ids"""
+        conn = connect(self.db_path)
         cursor = conn.cursor()
+        cursor.execute('SELECT candidate_id FROM questions')
+        candidate_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return candidate_ids
 
-        # Create questions table with additional fields
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS questions (
-            candidate_id TEXT PRIMARY KEY,
-            phone_number TEXT,
-            questions TEXT,
-            created_at TIMESTAMP,
-            status TEXT DEFAULT 'pending',
-            interview_complete BOOLEAN DEFAULT FALSE
-        )
-        ''')
+    def candidate_exists(self, user_id: str) -> bool:
+        """Check registration in the database"""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1 FROM questions WHERE candidate_id = ?', (user_id,))
+        user_exists = cursor.fetchone()
+        conn.close()
+        return user_exists is not None
 
-        # Create chat history table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS chat_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            candidate_id TEXT,
-            question TEXT,
-            answer TEXT,
-            timestamp TIMESTAMP
-        )
-        ''')
+    def last_archive_seq(self) -> int:
+        """Position of the latest archived candidate"""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT COALESCE(MAX(archive_seq), 0) FROM archived_questions')
+        archive_seq = cursor.fetchone()[0]
+        conn.close()
+        return archive_seq
 
-        conn.commit()
+    def archived_since(self, archive_seq: int) -> tuple:
+        """Candidates archived after archive_seq, and the new position"""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT archive_seq, candidate_id FROM archived_questions WHERE archive_seq > ? ORDER BY archive_seq',
+            (archive_seq,)
+        )
+        rows = cursor.fetchall()
         conn.close()
-        logger.info("SQLite database initialized")
+        return [row[1] for row in rows], rows[-1][0] if rows else archive_seq
+
+    async def sync_registrations(self):
+        """
+        Keep the registration cache current off the message path: drop
+        candidates the dashboard archived, and reload it every REFRESH_INTERVAL.
+        """
+        while True:
+            await asyncio.sleep(ARCHIVE_SYNC_INTERVAL)
+            try:
+                archived, self.archive_seq = await asyncio.to_thread(self.archived_since, self.archive_seq)
+                for candidate_id in archived:
+                    self.registrations.discard(candidate_id)
+                if self.registrations.reload_due():
+                    self.registrations.reload_started()
+                    self.registrations.replace(await asyncio.to_thread(self.load_candidate_ids))
+            except Exception as e:
+                logger.error(f"Error syncing registrations: {e}")
 
     async def connect(self):
         """Connect to Telegram"""
@@ -70,23 +139,85 @@ class InterviewClient:
         if not await self.client.is_user_authorized():
             logger.info("First time setup - you'll need to authenticate")
             await self.client.start()
+        self.outbox.start()
         logger.info("Client connected successfully")
 
     async def start(self):
         """Start the client and register handlers"""
         await self.connect()
+        await self.dispatcher.start()
+        self.timers.start()
+        self.loop_lag.start()
+        if METRICS_LOG_INTERVAL > 0:
+            self.metrics_reporter = asyncio.create_task(self.log_metrics(), name="metrics-log")
+        self.registration_sync = asyncio.create_task(self.sync_registrations(), name="registrations")
         
         @self.client.on(events.NewMessage())
         async def handle_message(event):
             if event.is_private:
-                sender = await event.get_sender()
-                if isinstance(sender, User):
-                    await self.process_message(event, sender)
+                # Serialized per chat, parallel across chats
+                await self.dispatcher.submit(event.chat_id, event)
 
         logger.info("Message handlers registered")
-        await self.client.run_until_disconnected()
+        try:
+            await self.client.run_until_disconnected()
+        finally:
+            for task in (self.metrics_reporter, self.registration_sync):
+                if task is not None:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+            await self.loop_lag.stop()
+            await self.timers.stop()
+            await self.dispatcher.stop()
+            await self.outbox.stop()
+
+    def metrics(self) -> dict:
+        """Where the bot spends its time: event loop, SQLite, Telegram sends, queues"""
+        return {
+            "event_loop_lag": self.loop_lag.metrics(),
+            "sqlite": statement_stats.metrics() if statement_stats.enabled else None,
+            "outbox": self.outbox.metrics(),
+            "dispatcher": self.dispatcher.metrics(),
+            "timers": self.timers.metrics(),
+            "active_interviews": len(self.active_interviews)
+        }
 
-    async def send_welcome_message(self, user_id: int):
+    async def log_metrics(self):
+        """Log a one-line metrics summary every METRICS_LOG_INTERVAL seconds"""
+        def ms(seconds):
+            return f"{seconds * 1000:.0f}ms" if seconds is not None else "-"
+
+        while True:
+            await asyncio.sleep(METRICS_LOG_INTERVAL)
+            metrics = self.metrics()
+            lag = metrics["event_loop_lag"]
+            outbox = metrics["outbox"]
+            sqlite_stats = metrics["sqlite"] or {}
+            logger.info(
+                f"loop lag p95 {ms(lag['p95'])} max {ms(lag['max'])} ({lag['stalls']} stalls); "
+                f"sqlite {sqlite_stats.get('statements', 0)} statements, "
+                f"{sqlite_stats.get('lock_waits', 0)} lock waits ({sqlite_stats.get('lock_wait_seconds', 0.0):.1f}s), "
+                f"{sqlite_stats.get('busy_errors', 0)} busy; "
+                f"sends {outbox['sent']} p95 {ms(outbox['send_latency']['p95'])}, "
+                f"{outbox['flood_waits']} flood waits ({outbox['flood_wait_seconds']}s), {outbox['queued']} queued; "
+                f"dispatcher {metrics['dispatcher']['pending']} pending; "
+                f"{metrics['active_interviews']} active interviews"
+            )
+
+    async def on_timer(self, candidate_id: str, kind: str):
+        """Queue a fired timer behind the candidate's pending messages"""
+        await self.dispatcher.submit(int(candidate_id), TimerFired(candidate_id, kind))
+
+    async def handle_event(self, event):
+        """Handle one private message or timer on a dispatcher worker"""
+        if isinstance(event, TimerFired):
+            await self.handle_timer(event)
+            return
+        # Users have positive ids; route without fetching the sender entity
+        if event.sender_id and event.sender_id > 0:
+            await self.process_message(event, str(event.sender_id))
+
+    async def send_welcome_message(self, user_id: str, registered_at: str):
         """Send a welcome message with instructions"""
         welcome_message = (
             "👋 Welcome to our automated Job Follow-up process!\n\n"
@@ -99,81 +230,99 @@ class InterviewClient:
             "6. Type /help for assistance\n\n"
             "Ready to begin? Type /start when you're ready!"
         )
-        await self.client.send_message(user_id, welcome_message)
+        self.outbox.send(user_id, welcome_message, intent=f"welcome:{user_id}:{registered_at}")
 
-    async def add_candidate(self, phone_number: str, questions: list):
+    async def add_candidate(self, phone_number: str, questions: list,
+                            candidate_ref: str = None, jd_id: str = None, cv_id: str = None,
+                            role: str = None):
         """Add a new candidate to the system"""
         try:
-            if not self.client.is_connected():
-                await self.connect()
-            await asyncio.sleep(2)
+            return await self.register_candidate(
+                phone_number, questions, candidate_ref=candidate_ref, jd_id=jd_id, cv_id=cv_id, role=role
+            )
+        except Exception as e:
+            logger.error(f"Error adding candidate: {e}")
+            return False
+
+    async def register_candidate(self, phone_number: str, questions: list,
+                                 candidate_ref: str = None, jd_id: str = None, cv_id: str = None,
+                                 role: str = None):
+        """Add a new candidate, raising the error if that fails (e.g. for retries)"""
+        if not self.client.is_connected():
+            await self.connect()
+        cached = self.entities.get_by_phone(phone_number)
+        if cached:
+            candidate_id = cached.user_id
+        else:
             try:
-                # Resolve phone number to Telegram ID with flood control handling
-                input_entity = await self.client.get_input_entity(phone_number)
-                print(input_entity)
-                contact = await self.client.get_entity(input_entity)
+                # Resolve phone number to Telegram user with flood control handling
+                contact = await self.client.get_entity(phone_number)
             except errors.FloodWaitError as e:
                 logger.warning(f"Need to wait {e.seconds} seconds before retrying")
                 await asyncio.sleep(e.seconds)  # Wait for the required time
-
-                # Resolve phone number to Telegram ID
-                input_entity = await self.client.get_input_entity(phone_number)
-                print(input_entity)
-                contact = await self.client.get_entity(input_entity)
+                contact = await self.client.get_entity(phone_number)
             candidate_id = str(contact.id)
-            
-            # Store in SQLite
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
+            self.entities.put(candidate_id, contact.access_hash, phone_number)
+        
+        # Store in SQLite
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        registered_at = datetime.utcnow().isoformat()
+        
+        cursor.execute('''
+        INSERT OR REPLACE INTO questions 
+        (candidate_id, phone_number, created_at, status, candidate_ref, jd_id, cv_id, role)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            candidate_id,
+            phone_number,
+            registered_at,
+            'pending',
+            candidate_ref,
+            jd_id,
+            cv_id,
+            role
+        ))
+        if role and jd_id:
+            # The role's current JD, for candidates registered without one
             cursor.execute('''
-            INSERT OR REPLACE INTO questions 
-            (candidate_id, phone_number, questions, created_at, status)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (
-                candidate_id,
-                phone_number,
-                json.dumps(questions),
-                datetime.utcnow().isoformat(),
-                'pending'
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            # Send welcome message to the candidate
-            await self.send_welcome_message(int(candidate_id))
-            
-            logger.info(f"Added candidate: {phone_number}")
-            return True
-        except Exception as e:
-            logger.error(f"Error adding candidate: {e}")
-            return False
+            INSERT INTO roles (name, jd_id, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET jd_id = excluded.jd_id, updated_at = excluded.updated_at
+            ''', (role, jd_id, registered_at))
+        cursor.execute('DELETE FROM interview_questions WHERE candidate_id = ?', (candidate_id,))
+        cursor.executemany('''
+        INSERT INTO interview_questions (candidate_id, position, question)
+        VALUES (?, ?, ?)
+        ''', [(candidate_id, position, question) for position, question in enumerate(questions)])
+        
+        conn.commit()
+        conn.close()
+        self.registrations.add(candidate_id)
+        
+        # Send welcome message to the candidate
+        await self.send_welcome_message(candidate_id, registered_at)
+        
+        logger.info(f"Added candidate: {phone_number}")
+        return True
 
-    async def process_message(self, event, sender: User):
+    async def process_message(self, event, user_id: str):
         """Process incoming messages with enhanced command handling"""
-        user_id = str(sender.id)
         message = event.message.text.lower()
 
-        # Check if user exists in database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT status FROM questions WHERE candidate_id = ?', (user_id,))
-        user_exists = cursor.fetchone()
-        conn.close()
-
-        if not user_exists and message != "/help":
-            await self.client.send_message(
-                int(user_id),
-                "⚠️ You're not registered for an followup. Please contact the HR team for registration."
-            )
+        # Check registration against the in-memory cache
+        if message != "/help" and not self.registrations.is_registered(user_id):
+            if self.registrations.should_reply(user_id):
+                self.outbox.send(
+                    user_id,
+                    "⚠️ You're not registered for an followup. Please contact the HR team for registration."
+                )
             return
 
         # Handle commands
         if message == "/start":
             await self.start_interview(user_id)
         elif message == "/help":
-            await self.send_help_message(int(user_id))
+            await self.send_help_message(user_id)
         elif message == "/pause":
             await self.pause_interview(user_id)
         elif message == "/resume":
@@ -181,7 +330,7 @@ class InterviewClient:
         elif user_id in self.active_interviews:
             await self.handle_response(user_id, event.message.text)
 
-    async def send_help_message(self, user_id: int):
+    async def send_help_message(self, user_id: str):
         """Send help message to user"""
         help_message = (
             "🆘 Need help? Here are the available commands:\n\n"
@@ -191,34 +340,125 @@ class InterviewClient:
             "/help - Show this help message\n\n"
             "If you're experiencing technical issues, please contact support at support@example.com"
         )
-        await self.client.send_message(user_id, help_message)
+        self.outbox.send(user_id, help_message)
 
     async def pause_interview(self, user_id: str):
         """Pause the ongoing interview"""
         if user_id in self.active_interviews:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute(
-                'UPDATE questions SET status = ? WHERE candidate_id = ?',
-                ('paused', user_id)
-            )
-            conn.commit()
-            conn.close()
-
+            self.save_paused(user_id)
             self.active_interviews[user_id]['paused'] = True
-            await self.client.send_message(
-                int(user_id),
+            self.outbox.send(
+                user_id,
+                "⏸️ Session paused. Type /resume when you're ready to continue."
+            )
+        elif self.pause_stored(user_id):
+            self.outbox.send(
+                user_id,
                 "⏸️ Session paused. Type /resume when you're ready to continue."
             )
         else:
-            await self.client.send_message(
-                int(user_id),
+            self.outbox.send(
+                user_id,
                 "No active Session to pause. Type /start to begin an Session."
             )
 
+    def save_paused(self, user_id: str):
+        """Persist a paused interview and its progress, and start the expiry timer"""
+        # /resume resends the current question, so a pending follow-up is dropped
+        self.active_interviews[user_id].pop("followup", None)
+        self.drop_followup(user_id)
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE questions SET status = ?, current_index = ? WHERE candidate_id = ?',
+            ('paused', self.active_interviews[user_id]['current_index'], user_id)
+        )
+        conn.commit()
+        conn.close()
+        self.timers.reschedule(user_id, {'expire': EXPIRE_AFTER}, cancel=('reminder', 'pause'))
+
+    def pause_stored(self, user_id: str) -> bool:
+        """
+        Pause an in-progress interview that is not in memory, e.g. after a
+        restart; its progress is already in the database. Returns whether
+        there was one to pause.
+        """
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE questions SET status = ? WHERE candidate_id = ? AND status = ?',
+            ('paused', user_id, 'in_progress')
+        )
+        paused = cursor.rowcount
+        conn.commit()
+        conn.close()
+        if paused:
+            self.timers.reschedule(user_id, {'expire': EXPIRE_AFTER}, cancel=('reminder', 'pause'))
+        return bool(paused)
+
+    def stored_progress(self, user_id: str):
+        """(status, current_index) of a candidate's interview in the database, or None"""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT status, current_index FROM questions WHERE candidate_id = ?', (user_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return row
+
+    async def handle_timer(self, timer: TimerFired):
+        """Remind, auto-pause or expire an idle interview"""
+        user_id = timer.candidate_id
+        interview = self.active_interviews.get(user_id)
+
+        if timer.kind == 'reminder':
+            if interview and not interview['paused']:
+                intent = f"reminder:{user_id}:{interview['session']}:{interview['current_index']}"
+            elif interview is None:
+                # Timers outlive the process; the interview may only be in the database
+                progress = self.stored_progress(user_id)
+                if not progress or progress[0] != 'in_progress':
+                    return
+                intent = f"reminder:{user_id}:stored:{progress[1]}"
+            else:
+                return
+            self.outbox.send(
+                user_id,
+                "👋 Just checking in! Your followup is waiting for your answer whenever you're ready.",
+                intent=intent
+            )
+        elif timer.kind == 'pause':
+            if interview and not interview['paused']:
+                self.save_paused(user_id)
+                # Progress is in the database; free the memory
+                del self.active_interviews[user_id]
+                paused = True
+            else:
+                paused = interview is None and self.pause_stored(user_id)
+            if paused:
+                self.outbox.send(
+                    user_id,
+                    "⏸️ Your followup was paused after a period of inactivity. Type /resume to continue where you left off."
+                )
+        elif timer.kind == 'expire':
+            conn = connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                'UPDATE questions SET status = ? WHERE candidate_id = ? AND status = ?',
+                ('expired', user_id, 'paused')
+            )
+            expired = cursor.rowcount
+            conn.commit()
+            conn.close()
+            if expired:
+                self.active_interviews.pop(user_id, None)
+                self.outbox.send(
+                    user_id,
+                    "⌛ Your followup has expired. Please contact the HR team if you'd like to continue."
+                )
+
     async def resume_interview(self, user_id: str):
         """Resume a paused Session"""
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute(
             'SELECT status FROM questions WHERE candidate_id = ? AND status = ?',
@@ -229,36 +469,63 @@ class InterviewClient:
 
         if paused_interview:
             if user_id in self.active_interviews:
+                conn = connect(self.db_path)
+                conn.execute(
+                    'UPDATE questions SET status = ? WHERE candidate_id = ?',
+                    ('in_progress', user_id)
+                )
+                conn.commit()
+                conn.close()
+                self.timers.cancel(user_id, 'expire')
                 self.active_interviews[user_id]['paused'] = False
-                await self.send_next_question(user_id,question_starters)
+                # Resending the current question is a new intent
+                self.active_interviews[user_id]['session'] = datetime.utcnow().isoformat()
+                await self.send_next_question(user_id)
             else:
-                await self.start_interview(user_id)
+                await self.start_interview(user_id, resume=True)
         else:
-            await self.client.send_message(
-                int(user_id),
+            self.outbox.send(
+                user_id,
                 "No paused Session found. Type /start to begin a new Session."
             )
 
-    async def start_interview(self, user_id: str):
-        """Start or restart an interview"""
-        conn = sqlite3.connect(DB_PATH)
+    async def start_interview(self, user_id: str, resume: bool = False):
+        """Start or restart an interview, or resume one evicted from memory"""
+        conn = connect(self.db_path)
         cursor = conn.cursor()
+
+        cursor.execute('SELECT status, current_index, role FROM questions WHERE candidate_id = ?', (user_id,))
+        row = cursor.fetchone()
+        if row and row[0] == 'expired':
+            conn.close()
+            self.outbox.send(
+                user_id,
+                "⌛ Your followup has expired. Please contact the HR team if you'd like to continue."
+            )
+            return
         
-        cursor.execute('SELECT questions FROM questions WHERE candidate_id = ?', (user_id,))
-        result = cursor.fetchone()
+        cursor.execute(
+            'SELECT question FROM interview_questions WHERE candidate_id = ? ORDER BY position',
+            (user_id,)
+        )
+        questions = [row[0] for row in cursor.fetchall()]
         
-        if not result:
-            await self.client.send_message(
-                int(user_id),
+        if not questions:
+            conn.close()
+            self.outbox.send(
+                user_id,
                 "⚠️ No followup questions found. Please contact HR for assistance."
             )
             return
 
-        questions = json.loads(result[0])
         self.active_interviews[user_id] = {
-            "current_index": 0,
+            "current_index": row[1] if resume and row else 0,
             "questions": questions,
-            "paused": False
+            "paused": False,
+            # Selects per-role starters, if the role has its own
+            "role": row[2] if row else None,
+            # Distinguishes restarts in outbound message intents
+            "session": datetime.utcnow().isoformat()
         }
 
         # Update status
@@ -269,11 +536,13 @@ class InterviewClient:
         conn.commit()
         conn.close()
 
-        await self.client.send_message(
-            int(user_id),
+        self.timers.cancel(user_id, 'expire')
+        self.outbox.send(
+            user_id,
+            "▶️ Resuming your followup where you left off." if resume else
             "🎯 Your followup is starting now. Take your time to answer each question thoughtfully."
         )
-        await self.send_next_question(user_id,question_starters)
+        await self.send_next_question(user_id)
 
     async def handle_response(self, user_id: str, answer: str):
         """Handle interview responses"""
@@ -281,10 +550,19 @@ class InterviewClient:
             return
 
         interview = self.active_interviews[user_id]
-        current_question = interview["questions"][interview["current_index"]]
-
-        # Save response
-        conn = sqlite3.connect(DB_PATH)
+        followup = interview.pop("followup", None)
+        current_question = followup or interview["questions"][interview["current_index"]]
+
+        # Probe a thin answer once, if the speculative follow-up is ready
+        probe = None
+        if followup is None and is_thin_answer(answer):
+            probe = self.ready_followup(user_id, interview["current_index"])
+        if not probe:
+            # Move to next question
+            interview["current_index"] += 1
+
+        # Save response and progress, so timers and /resume work after a restart
+        conn = connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -296,32 +574,73 @@ class InterviewClient:
             answer,
             datetime.utcnow().isoformat()
         ))
+        cursor.execute(
+            'UPDATE questions SET current_index = ? WHERE candidate_id = ?',
+            (interview["current_index"], user_id)
+        )
         
         conn.commit()
         conn.close()
 
-        # Move to next question
-        interview["current_index"] += 1
-        await self.send_next_question(user_id,question_starters)
+        if probe:
+            interview["followup"] = probe
+            self.outbox.send(
+                user_id,
+                f"🔎 {probe}",
+                intent=f"followup:{user_id}:{interview['session']}:{interview['current_index']}"
+            )
+            return
+
+        await self.send_next_question(user_id)
 
-    async def send_next_question(self, user_id: str,question_starters):
+    def prefetch_followup(self, user_id: str, index: int, question: str):
+        """Generate a follow-up in the background while the candidate answers"""
+        if not ADAPTIVE_FOLLOWUPS:
+            return
+        self.drop_followup(user_id)
+        task = asyncio.ensure_future(asyncio.to_thread(generate_followup, question))
+        self.followups[user_id] = (index, task)
+
+    def drop_followup(self, user_id: str):
+        """Cancel a follow-up still being generated for the candidate"""
+        entry = self.followups.pop(user_id, None)
+        if entry:
+            entry[1].cancel()
+
+    def ready_followup(self, user_id: str, index: int):
+        """The precomputed follow-up for a question, only if already finished"""
+        entry = self.followups.pop(user_id, None)
+        if not entry:
+            return None
+        entry_index, task = entry
+        if entry_index != index or not task.done():
+            # Not ready: move on rather than make the candidate wait
+            task.cancel()
+            return None
+        if task.cancelled() or task.exception():
+            return None
+        return task.result()
+
+    async def send_next_question(self, user_id: str):
         """Send the next question with progress indicator"""
         interview = self.active_interviews[user_id]
         total_questions = len(interview["questions"])
         if interview["current_index"] < total_questions:
             question = interview["questions"][interview["current_index"]]
             # progress = f"Question {interview['current_index'] + 1} of {total_questions}"
-            if (interview["current_index"]+1)!=1:
-                index=interview["current_index"]+1
-                progress=question_starters[index]
-            else:
-                progress='Thank you for joining. Here’s your first question.'
+            progress = assets.starter(interview["current_index"], role=interview.get("role"))
             message = f"📝 {progress}\n\n{question}\n\n(Type /pause if you need a break)"
-            await self.client.send_message(int(user_id), message)
-            time.sleep(random.randint(3,5))
+            self.outbox.send(
+                user_id,
+                message,
+                intent=f"question:{user_id}:{interview['session']}:{interview['current_index']}"
+            )
+            self.prefetch_followup(user_id, interview["current_index"], question)
+            # Restart the idle clock
+            self.timers.reschedule(user_id, {'reminder': REMINDER_AFTER, 'pause': PAUSE_AFTER})
 
         else:
-            conn = sqlite3.connect(DB_PATH)
+            conn = connect(self.db_path)
             cursor = conn.cursor()
             cursor.execute(
                 'UPDATE questions SET status = ?, interview_complete = ? WHERE candidate_id = ?',
@@ -336,57 +655,26 @@ class InterviewClient:
                 "Our team will review your answers and get back to you soon.\n\n"
                 "Best of luck! 🍀"
             )
-            await self.client.send_message(int(user_id), completion_message)
+            self.outbox.send(user_id, completion_message, intent=f"complete:{user_id}:{interview['session']}")
+            self.timers.cancel(user_id, 'reminder', 'pause', 'expire')
+            self.drop_followup(user_id)
             del self.active_interviews[user_id]
-            logger.info("All questions sent. Terminating..")
-            os._exit(0)
+            logger.info(f"All questions sent to {user_id}")
 
 
-async def read_questions_from_file(filename: str = "followup_questions.txt") -> list:
-    """
-    Read questions from a text file.
-    
-    Args:
-        filename (str): Name of the file containing questions
-        
-    Returns:
-        list: List of questions
-    """
-    try:
-        with open(filename, 'r') as f:
-            # Read lines and remove empty lines and whitespace
-            questions = [line.strip() for line in f.readlines() if line.strip()]
-        return questions
-    except FileNotFoundError:
-        logger.error(f"Questions file {filename} not found")
-        return []
-    except Exception as e:
-        logger.error(f"Error reading questions file: {e}")
-        return []
-
-async def test_interview():
+async def serve():
+    """Run the interview service: Telegram client plus the handoff endpoint"""
+    # Time every SQLite statement this process runs
+    statement_stats.enabled = True
     client = InterviewClient(API_ID, API_HASH)
     await client.connect()
-    
-    # Read questions from file
-    questions = await read_questions_from_file()
-    
-    if not questions:
-        logger.error("No questions loaded from file. Exiting...")
-        return
-    
-    # Add test candidate
-    test_phone = "+94714479827"  # Replace with actual phone number
-    await asyncio.sleep(5)
-    
-    success = await client.add_candidate(test_phone, questions)
-    
-    if success:
-        logger.info("Test candidate added successfully")
+
+    handoffs = HandoffService(client, client.db_path, metrics=client.metrics)
+    await handoffs.start()
+    try:
         await client.start()
-        client.disconnect()
-    else:
-        logger.error("Failed to add test candidate")
+    finally:
+        await handoffs.stop()
 
 if __name__ == "__main__":
-    asyncio.run(test_interview())
\ No newline at end of file
+    asyncio.run(serve())
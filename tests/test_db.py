@@ -0,0 +1,71 @@
+# tests/test_db.py
+import json
+import sqlite3
+import threading
+import time
+import db
+
+def baseline_db(path: str):
+    """A database as the original bot left it: version 1 tables with data."""
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    db._baseline(cursor)
+    cursor.execute(
+        'INSERT INTO questions (candidate_id, phone_number, questions, created_at, status) VALUES (?, ?, ?, ?, ?)',
+        ('1001', '+1234567890', json.dumps(['First?', 'Second?']), '2024-01-01T00:00:00', 'pending')
+    )
+    cursor.execute(
+        'INSERT INTO chat_history (candidate_id, question, answer, timestamp) VALUES (?, ?, ?, ?)',
+        ('1001', 'First?', 'An answer', '2024-01-01T00:01:00')
+    )
+    cursor.execute('PRAGMA user_version = 1')
+    conn.commit()
+    conn.close()
+
+def test_concurrent_migrations_apply_each_migration_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "interviews.db")
+    baseline_db(path)
+
+    applied = []
+    migrations = []
+    for migration in db.MIGRATIONS:
+        def counted(cursor, migration=migration):
+            applied.append(migration.__name__)
+            # Hold the write lock so the other process reads the old version first
+            time.sleep(0.2)
+            migration(cursor)
+        counted.__name__ = migration.__name__
+        migrations.append(counted)
+    monkeypatch.setattr(db, "MIGRATIONS", migrations)
+
+    start = threading.Barrier(2)
+    versions, errors = [], []
+
+    def process():
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            start.wait()
+            versions.append(db.migrate(conn))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=process) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert versions == [len(migrations)] * 2
+    assert sorted(applied) == sorted(m.__name__ for m in migrations[1:])
+
+    conn = sqlite3.connect(path)
+    questions = conn.execute(
+        'SELECT question FROM interview_questions WHERE candidate_id = ? ORDER BY position', ('1001',)
+    ).fetchall()
+    answers = conn.execute('SELECT COUNT(*) FROM chat_history').fetchone()[0]
+    conn.close()
+    assert questions == [('First?',), ('Second?',)]
+    assert answers == 1
@@ -0,0 +1,131 @@
+# timers.py
+import asyncio
+import heapq
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+from db import connect, DB_PATH
+
+logger = logging.getLogger(__name__)
+
+class TimerScheduler:
+    """
+    Persistent one-shot timers keyed by (candidate_id, kind).
+
+    Pending timers live in the timers table and in an in-memory heap. A single
+    task sleeps until the earliest due time, so the cost does not depend on
+    how many timers are pending. Rescheduling a key replaces its previous due
+    time; stale heap entries are skipped when popped.
+    """
+
+    def __init__(self, on_fire: Callable[[str, str], Awaitable[None]], db_path: str = DB_PATH):
+        self.on_fire = on_fire
+        self.db_path = db_path
+        self.heap = []
+        self.due = {}
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.fired = 0
+
+    def start(self):
+        """Load pending timers and start the timer task."""
+        if self.task is not None:
+            return
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT candidate_id, kind, due_at FROM timers')
+        rows = cursor.fetchall()
+        conn.close()
+        for candidate_id, kind, due_at in rows:
+            self.due[(candidate_id, kind)] = due_at
+            self.heap.append((due_at, candidate_id, kind))
+        heapq.heapify(self.heap)
+        logger.info(f"Loaded {len(rows)} pending timers")
+        self.task = asyncio.create_task(self._run(), name="timers")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def schedule(self, candidate_id: str, kind: str, delay: float):
+        """Fire kind for candidate_id after delay seconds, replacing any pending one."""
+        self.reschedule(candidate_id, {kind: delay})
+
+    def cancel(self, candidate_id: str, *kinds: str):
+        """Cancel the given kinds of timer for a candidate."""
+        self.reschedule(candidate_id, {}, kinds)
+
+    def reschedule(self, candidate_id: str, delays: dict, cancel: tuple = ()):
+        """
+        Set and cancel several timers of one candidate in a single transaction.
+
+        Args:
+            candidate_id (str): Candidate the timers belong to
+            delays (dict): Seconds from now, by timer kind
+            cancel (tuple): Timer kinds to cancel
+        """
+        now = time.time()
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        for kind in cancel:
+            self.due.pop((candidate_id, kind), None)
+            cursor.execute('DELETE FROM timers WHERE candidate_id = ? AND kind = ?', (candidate_id, kind))
+        for kind, delay in delays.items():
+            due_at = now + delay
+            cursor.execute('''
+            INSERT INTO timers (candidate_id, kind, due_at) VALUES (?, ?, ?)
+            ON CONFLICT(candidate_id, kind) DO UPDATE SET due_at = excluded.due_at
+            ''', (candidate_id, kind, due_at))
+            self.due[(candidate_id, kind)] = due_at
+            heapq.heappush(self.heap, (due_at, candidate_id, kind))
+        conn.commit()
+        conn.close()
+
+        if delays:
+            self._compact()
+            self.wakeup.set()
+
+    def _compact(self):
+        # Rebuild once stale entries from rescheduling dominate the heap
+        if len(self.heap) > 2 * len(self.due) + 1024:
+            self.heap = [(due_at, candidate_id, kind) for (candidate_id, kind), due_at in self.due.items()]
+            heapq.heapify(self.heap)
+
+    async def _run(self):
+        while True:
+            if not self.heap:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            due_at, candidate_id, kind = self.heap[0]
+            if self.due.get((candidate_id, kind)) != due_at:
+                # Cancelled or rescheduled
+                heapq.heappop(self.heap)
+                continue
+
+            delay = due_at - time.time()
+            if delay > 0:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self.heap)
+            self.cancel(candidate_id, kind)
+            self.fired += 1
+            try:
+                await self.on_fire(candidate_id, kind)
+            except Exception as e:
+                logger.error(f"Error firing {kind} timer for {candidate_id}: {e}")
+
+    def metrics(self) -> dict:
+        return {
+            "pending_timers": len(self.due),
+            "heap_size": len(self.heap),
+            "fired": self.fired
+        }
@@ -0,0 +1,96 @@
+# transcript.py
+import json
+import re
+from typing import List, Dict, Tuple
+
+# Rough characters-per-token ratio for English prompts
+CHARS_PER_TOKEN = 4
+
+# Framing the bot adds around questions, which the model does not need
+PREAMBLE_PATTERNS = (
+    re.compile(r"^📝[^\n]*\n+"),
+    re.compile(r"^Thank you for joining\. Here.s your first question\.\s*"),
+    re.compile(r"\s*\(Type /pause if you need a break\)\s*$"),
+)
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a prompt fragment."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def strip_preamble(question: str, starters: Tuple[str, ...] = ()) -> str:
+    """Remove progress lines, question starters and hints from a question."""
+    text = question.strip()
+    for pattern in PREAMBLE_PATTERNS:
+        text = pattern.sub("", text)
+    for starter in starters:
+        if starter and text.startswith(starter):
+            text = text[len(starter):]
+            break
+    return text.strip()
+
+def encode_pair(number: int, pair: Dict, starters: Tuple[str, ...] = ()) -> str:
+    """Encode one Q&A record as numbered Q/A lines."""
+    question = strip_preamble(str(pair.get("question") or ""), starters)
+    answer = " ".join(str(pair.get("answer") or "").split())
+    return f"Q{number}: {question}\nA{number}: {answer}"
+
+def encode_transcript(pairs: List[Dict], start: int = 1, starters: Tuple[str, ...] = ()) -> str:
+    """
+    Encode Q&A records as a compact numbered transcript.
+
+    Only the question and answer are kept; ids, candidate ids and timestamps
+    are dropped.
+
+    Args:
+        pairs (list): Q&A records in interview order
+        start (int): Number of the first pair, for chunks of a longer interview
+        starters (tuple): Question starter lines to strip from questions
+
+    Returns:
+        str: Transcript with one Q line and one A line per pair
+    """
+    return "\n".join(
+        encode_pair(number, pair, starters)
+        for number, pair in enumerate(pairs, start)
+    )
+
+def token_report(pairs: List[Dict], transcript: str) -> Dict[str, int]:
+    """Compare the compact transcript with the previous indented-JSON prompt."""
+    json_tokens = estimate_tokens(json.dumps(pairs, indent=2, default=str))
+    transcript_tokens = estimate_tokens(transcript)
+    return {
+        "pairs": len(pairs),
+        "json_tokens": json_tokens,
+        "transcript_tokens": transcript_tokens,
+        "saved_tokens": json_tokens - transcript_tokens
+    }
+
+def chunk_qa_pairs(pairs: List[Dict], token_budget: int) -> List[Tuple[int, List[Dict]]]:
+    """
+    Split Q&A records into consecutive chunks that fit a token budget.
+
+    A single pair larger than the budget is kept on its own rather than split.
+
+    Args:
+        pairs (list): Q&A records in interview order
+        token_budget (int): Maximum estimated tokens per chunk
+
+    Returns:
+        list: (number of the first pair, records) for each chunk
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    start = 1
+    for number, pair in enumerate(pairs, 1):
+        pair_tokens = estimate_tokens(encode_pair(number, pair)) + 1
+        if current and current_tokens + pair_tokens > token_budget:
+            chunks.append((start, current))
+            start = number
+            current = []
+            current_tokens = 0
+        current.append(pair)
+        current_tokens += pair_tokens
+    if current:
+        chunks.append((start, current))
+    return chunks